@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from threads_logic import THREAD_BUDGET
+
+MAX_BATCH = 4 # frames of different regions detected in one call
+
+
+class RegionStopped(Exception):
+    """Raised in place of a model call of a region that was stopped while the call was waiting."""
+
+
+class _Job:
+    __slots__ = ('region', 'stage', 'fn', 'payload', 'future')
+
+    def __init__(self, region, stage, fn, payload):
+        self.region = region
+        self.stage = stage
+        self.fn = fn
+        self.payload = payload
+        self.future = Future()
+
+
+class SharedBackend:
+    """One worker thread that runs the model calls of every live region.
+
+    Regions take turns, one job per turn, so a page full of bubbles in one region can't starve the others. A stage
+    with a batch function (detection) also takes that stage's waiting jobs from the other regions and runs them as
+    one call. Model time is booked per region and stage, that is what the region report shows. Background jobs
+    (prefetching) only run while no region has anything waiting.
+    """
+    def __init__(self, batch_fns=None, max_batch=MAX_BATCH):
+        self.batch_fns = batch_fns or {} # stage -> fn(payloads) -> one result per payload
+        self.max_batch = max_batch
+        self._queues = OrderedDict() # region -> waiting jobs, the order is the round robin order
+        self._background = deque() # low priority jobs, served one at a time when every region queue is empty
+        self._cancelled = set() # forgotten regions, their jobs are dropped instead of run
+        self._cond = threading.Condition()
+        self._worker = None
+        self.busy = {} # region -> stage -> seconds of model time
+        self.batches = 0 # batched calls that served more than one region
+        self.batched_jobs = 0
+
+    def run(self, region, stage, fn=None, payload=None, background=False):
+        """Queues one model call for region and waits for it, its exception is raised here.
+
+        Batched stages pass payload, everything else a fn that does the call.
+        """
+        job = _Job(region, stage, fn, payload)
+        with self._cond:
+            if region in self._cancelled: raise RegionStopped(region)
+            if background: self._background.append(job)
+            else: self._queues.setdefault(region, deque()).append(job)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work_loop, daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return job.future.result()
+
+    def open(self, region):
+        # a region id used again after forget(), the prefetcher's is
+        with self._cond:
+            self._cancelled.discard(region)
+
+    def forget(self, region):
+        """Drops the region's waiting jobs, their callers get RegionStopped, and refuses new ones until open()."""
+        with self._cond:
+            self._cancelled.add(region)
+            dropped = list(self._queues.pop(region, ()))
+            dropped += [job for job in self._background if job.region == region]
+            self._background = deque(job for job in self._background if job.region != region)
+            self.busy.pop(region, None)
+        for job in dropped: job.future.set_exception(RegionStopped(region))
+
+    def _next_batch(self):
+        # called with the lock held
+        waiting = [region for region, queue in self._queues.items() if queue]
+        if not waiting:
+            # a running background job is never interrupted, but it is only ever one model call long
+            return [self._background.popleft()] if self._background else None
+        first = self._queues[waiting[0]].popleft()
+        batch = [first]
+        if first.stage in self.batch_fns:
+            for region in waiting[1:]:
+                if len(batch) >= self.max_batch: break
+                queue = self._queues[region]
+                if queue[0].stage == first.stage: batch.append(queue.popleft())
+        for job in batch:
+            self._queues.move_to_end(job.region) # served this turn, back of the line
+        return batch
+
+    def _work_loop(self):
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+                while batch is None:
+                    self._cond.wait()
+                    batch = self._next_batch()
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        with self._cond:
+            stopped = [job for job in batch if job.region in self._cancelled]
+            batch = [job for job in batch if job.region not in self._cancelled]
+        for job in stopped: job.future.set_exception(RegionStopped(job.region))
+        if not batch: return
+        stage = batch[0].stage
+        start = time.perf_counter()
+        try:
+            with THREAD_BUDGET.stage(stage):
+                if stage in self.batch_fns:
+                    results = self.batch_fns[stage]([job.payload for job in batch])
+                else:
+                    results = [batch[0].fn()]
+        except Exception as e:
+            for job in batch: job.future.set_exception(e)
+        else:
+            for job, result in zip(batch, results): job.future.set_result(result)
+
+        # a batch's time is split evenly between the regions in it
+        seconds = (time.perf_counter() - start) / len(batch)
+        with self._cond:
+            for job in batch:
+                if job.region in self._cancelled: continue # stopped while its call ran
+                stages = self.busy.setdefault(job.region, {})
+                stages[stage] = stages.get(stage, 0.0) + seconds
+            if len(batch) > 1:
+                self.batches += 1
+                self.batched_jobs += len(batch)
+
+    def depth(self) -> int:
+        # jobs waiting for the worker, the one it is running not counted
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values()) + len(self._background)
+
+    def busy_seconds(self, region) -> float:
+        return sum(self.busy.get(region, {}).values())
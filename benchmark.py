@@ -0,0 +1,937 @@
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STUB_TIMINGS = "detect=40,ocr=25,mt=30" # ms, mt is per beam
+REGRESSION_TOLERANCE = 0.15
+
+# fixed sentence set with reference translations, keep it stable so runs are comparable
+MT_SENTENCES = [
+    ("おはようございます。", "Good morning."),
+    ("これは何ですか？", "What is this?"),
+    ("俺はもう逃げない！", "I won't run away anymore!"),
+    ("あなたのことがずっと好きでした。", "I've always liked you."),
+    ("早く来い！電車が出るぞ！", "Come on! The train is leaving!"),
+    ("この町には秘密がある。", "This town has a secret."),
+    ("お腹が空いたから、ラーメンを食べに行こう。", "I'm hungry, so let's go eat ramen."),
+    ("絶対に許さない。", "I'll never forgive you."),
+    ("明日は雨が降るらしいよ。", "I heard it's going to rain tomorrow."),
+    ("先生、宿題を忘れました。", "Teacher, I forgot my homework."),
+    ("ここは危ないから下がっていろ。", "It's dangerous here, so stay back."),
+    ("ありがとう、助かったよ。", "Thanks, you saved me."),
+]
+
+def chrf(hypothesis: str, reference: str, max_n: int = 6, beta: float = 2.0) -> float:
+    """Character n-gram F-score (chrF), good enough to spot quality drops without extra deps."""
+    hyp, ref = hypothesis.replace(' ', ''), reference.replace(' ', '')
+    precisions, recalls = [], []
+    for n in range(1, max_n + 1):
+        hyp_ngrams = Counter(hyp[i:i + n] for i in range(len(hyp) - n + 1))
+        ref_ngrams = Counter(ref[i:i + n] for i in range(len(ref) - n + 1))
+        if not hyp_ngrams or not ref_ngrams: continue
+        overlap = sum((hyp_ngrams & ref_ngrams).values())
+        precisions.append(overlap / sum(hyp_ngrams.values()))
+        recalls.append(overlap / sum(ref_ngrams.values()))
+    if not precisions: return 0.0
+    p, r = statistics.mean(precisions), statistics.mean(recalls)
+    if p + r == 0: return 0.0
+    return 100 * (1 + beta ** 2) * p * r / (beta ** 2 * p + r)
+
+def run_mt_sentences(tokenizer, model, generate_kwargs, repeats=3):
+    import torch
+
+    outputs, latencies = [], []
+    with torch.inference_mode():
+        for text, _ in MT_SENTENCES:
+            inputs = tokenizer(text, return_tensors='pt', padding=True)
+            model.generate(**inputs, **generate_kwargs) # warm up caches for this length
+            for _ in range(repeats):
+                start = time.perf_counter()
+                tokens = model.generate(**inputs, **generate_kwargs)
+                latencies.append(time.perf_counter() - start)
+            outputs.append(tokenizer.decode(tokens[0], skip_special_tokens=True))
+    return outputs, latencies
+
+def bench_mt_quant(args):
+    import torch
+    from transformers import MarianMTModel, MarianTokenizer
+    from model_logic import TRANSLATION_MODEL_NAME, TRANSLATION_MODEL_PATH, load_quantized_translator
+    from translation_logic import DECODING_PROFILES
+
+    if args.threads: torch.set_num_threads(args.threads)
+    generate_kwargs = DECODING_PROFILES[args.profile]
+
+    tokenizer = MarianTokenizer.from_pretrained(TRANSLATION_MODEL_NAME, cache_dir=TRANSLATION_MODEL_PATH)
+
+    start = time.perf_counter()
+    fp32_model = MarianMTModel.from_pretrained(TRANSLATION_MODEL_NAME, cache_dir=TRANSLATION_MODEL_PATH).eval()
+    fp32_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    int8_model = load_quantized_translator(TRANSLATION_MODEL_NAME)
+    int8_load = time.perf_counter() - start
+
+    rows = {}
+    for name, model, load_time in (("fp32", fp32_model, fp32_load), ("int8", int8_model, int8_load)):
+        outputs, latencies = run_mt_sentences(tokenizer, model, generate_kwargs, args.repeats)
+        scores = [chrf(out, ref) for out, (_, ref) in zip(outputs, MT_SENTENCES)]
+        rows[name] = dict(outputs=outputs, load=load_time, mean=statistics.mean(latencies),
+                          p50=statistics.median(latencies), chrf=statistics.mean(scores))
+
+    print(f"{'mode':<6}{'load s':>9}{'mean ms':>10}{'p50 ms':>10}{'chrF':>8}")
+    for name, row in rows.items():
+        print(f"{name:<6}{row['load']:>9.2f}{row['mean'] * 1000:>10.1f}{row['p50'] * 1000:>10.1f}{row['chrf']:>8.1f}")
+    print(f"speedup: {rows['fp32']['mean'] / rows['int8']['mean']:.2f}x")
+
+    if args.verbose:
+        for (text, ref), fp32_out, int8_out in zip(MT_SENTENCES, rows['fp32']['outputs'], rows['int8']['outputs']):
+            print(f"\n{text}\n  ref : {ref}\n  fp32: {fp32_out}\n  int8: {int8_out}")
+
+def bench_mt_profiles(args):
+    import torch
+    from transformers import MarianTokenizer
+    from model_logic import TRANSLATION_MODEL_NAME, TRANSLATION_MODEL_PATH, load_translator
+    from translation_logic import DECODING_PROFILES
+
+    if args.threads: torch.set_num_threads(args.threads)
+    tokenizer = MarianTokenizer.from_pretrained(TRANSLATION_MODEL_NAME, cache_dir=TRANSLATION_MODEL_PATH)
+    model = load_translator(TRANSLATION_MODEL_NAME, 'cpu', quantize=args.quantize)
+
+    print(f"{'profile':<10}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}{'chrF':>8}")
+    for name, generate_kwargs in DECODING_PROFILES.items():
+        outputs, latencies = run_mt_sentences(tokenizer, model, generate_kwargs, args.repeats)
+        score = statistics.mean(chrf(out, ref) for out, (_, ref) in zip(outputs, MT_SENTENCES))
+        print(f"{name:<10}{statistics.mean(latencies) * 1000:>10.1f}{statistics.median(latencies) * 1000:>10.1f}"
+              f"{max(latencies) * 1000:>10.1f}{score:>8.1f}")
+
+def percentile(values, q):
+    # linear interpolation between closest ranks, same as numpy's default
+    ordered = sorted(values)
+    if not ordered: return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024 # bytes on macOS, KiB on Linux
+    except ImportError:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+
+# stub backends, same call signatures as YOLO / MangaOcr / Marian with fixed timings
+class StubArray:
+    def __init__(self, array): self.array = array
+    def cpu(self): return self
+    def numpy(self): return self.array
+
+class StubBox:
+    def __init__(self, xyxy): self.xyxy = [xyxy]
+
+class StubMasks:
+    def __init__(self, masks, orig_shape):
+        self.data = [StubArray(m) for m in masks]
+        self.orig_shape = orig_shape
+    def __bool__(self): return bool(self.data)
+
+    @property
+    def xy(self):
+        # like ultralytics, largest contour of each mask scaled up to frame pixels
+        import cv2
+        import numpy as np
+        h, w = self.orig_shape
+        polygons = []
+        for m in self.data:
+            contours, _ = cv2.findContours((m.array > 0.5).astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            if not contours:
+                polygons.append(np.zeros((0, 2), dtype=np.float32))
+                continue
+            contour = max(contours, key=len).reshape(-1, 2).astype(np.float32)
+            polygons.append(contour * (w / m.array.shape[1], h / m.array.shape[0]))
+        return polygons
+
+class StubResult:
+    def __init__(self, boxes, masks, orig_shape):
+        self.boxes = [StubBox(b) for b in boxes]
+        self.masks = StubMasks(masks, orig_shape) if masks else None
+
+class StubBubbleModel:
+    """Finds bright blobs, good enough for the synthetic pages."""
+    MASK_SIZE = 160 # YOLO masks come at model resolution, not frame resolution
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def predict(self, source, conf=0.4, verbose=False):
+        import cv2
+        import numpy as np
+        if isinstance(source, list): # batched call, no batching speedup assumed
+            return [self.predict(frame, conf, verbose)[0] for frame in source]
+        time.sleep(self.latency)
+        gray = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
+        _, bright = cv2.threshold(gray, 235, 255, cv2.THRESH_BINARY)
+        bright = cv2.morphologyEx(bright, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(bright)
+        boxes, masks = [], []
+        for i in range(1, count):
+            x, y, w, h, area = stats[i]
+            if area < 900: continue
+            boxes.append((x, y, x + w, y + h))
+            mask = (labels == i).astype(np.float32)
+            masks.append(cv2.resize(mask, (self.MASK_SIZE, self.MASK_SIZE), interpolation=cv2.INTER_AREA))
+        return [StubResult(boxes, masks, source.shape[:2])]
+
+class StubOcr:
+    JITTER = (
+        lambda t, r: t + '！',
+        lambda t, r: t.replace('。', '．'),
+        lambda t, r: t[:len(t) // 2] + ' ' + t[len(t) // 2:],
+        lambda t, r: t[:-2] + t[-1], # one character lost
+    )
+
+    def __init__(self, latency, jitter=0.0, seed=1234):
+        self.latency = latency
+        self.jitter = jitter # chance that a read comes back slightly off, like MangaOcr between frames
+        self._rng = random.Random(seed)
+
+    def __call__(self, img):
+        import numpy as np
+        time.sleep(self.latency)
+        # derived from the pixels so identical crops read identically
+        text = MT_SENTENCES[int(np.asarray(img).sum()) % len(MT_SENTENCES)][0]
+        if self.jitter and self._rng.random() < self.jitter:
+            text = self._rng.choice(self.JITTER)(text, self._rng)
+        return text
+
+class StubEncoding(dict):
+    def to(self, device): return self
+
+class StubTokenizer:
+    def __call__(self, text, **kwargs): return StubEncoding(text=text)
+    def decode(self, tokens, skip_special_tokens=True):
+        return dict(MT_SENTENCES).get(tokens, tokens)
+
+class StubTranslator:
+    def __init__(self, latency_per_beam):
+        self.latency_per_beam = latency_per_beam
+
+    def generate(self, text=None, num_beams=1, stopping_criteria=None, **kwargs):
+        time.sleep(self.latency_per_beam * num_beams)
+        return [text]
+
+def parse_stub_timings(spec: str) -> dict:
+    timings = dict(item.split('=') for item in spec.split(',') if item)
+    return {name: float(value) / 1000 for name, value in timings.items()}
+
+def load_backend(args) -> dict:
+    if args.backend == 'real':
+        from model_logic import load_models
+        models = load_models(quantize=args.quantize)
+        if not models: sys.exit("Real models could not be loaded, is ./models populated?")
+        return models
+    timings = parse_stub_timings(args.stub_timings)
+    return {
+        'bubble': StubBubbleModel(timings.get('detect', 0)),
+        'ocr': StubOcr(timings.get('ocr', 0), jitter=getattr(args, 'ocr_jitter', 0.0)),
+        'tokenizer': StubTokenizer(),
+        'translator': StubTranslator(timings.get('mt', 0)),
+        'device': 'cpu',
+    }
+
+def synthetic_frames(count, width, height, seed=1234):
+    """Screentone pages with white bubbles full of glyph-like strokes, same pixels for the same seed."""
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.RandomState(seed)
+    frames, bubbles = [], []
+    for _ in range(count):
+        page = rng.randint(90, 200, size=(height, width), dtype=np.uint8)
+        page = cv2.GaussianBlur(page, (5, 5), 0)
+        page = cv2.cvtColor(page, cv2.COLOR_GRAY2RGB)
+        page_bubbles = []
+        for _ in range(rng.randint(3, 7)):
+            # at most half the page so it fits, pages of the usual sizes draw the same bubbles as before
+            bw, bh = min(rng.randint(70, 160), (width - 1) // 2), min(rng.randint(90, 200), (height - 1) // 2)
+            cx, cy = rng.randint(bw, width - bw), rng.randint(bh, height - bh)
+            if any(abs(cx - ox) < (bw + ow) // 2 + 10 and abs(cy - oy) < (bh + oh) // 2 + 10 for ox, oy, ow, oh in page_bubbles):
+                continue
+            draw_bubble(page, (cx - bw // 2, cy - bh // 2, cx + bw // 2, cy + bh // 2), rng)
+            page_bubbles.append((cx, cy, bw, bh))
+        frames.append(Image.fromarray(page))
+        bubbles.append([(cx - bw // 2, cy - bh // 2, cx + bw // 2, cy + bh // 2) for cx, cy, bw, bh in page_bubbles])
+    return frames, bubbles
+
+def draw_bubble(page, box, rng):
+    # white ellipse filling box, drawing it again over an existing bubble replaces its text
+    import cv2
+    x1, y1, x2, y2 = box
+    cx, cy, bw, bh = (x1 + x2) // 2, (y1 + y2) // 2, x2 - x1, y2 - y1
+    cv2.ellipse(page, (cx, cy), (bw // 2, bh // 2), 0, 0, 360, (255, 255, 255), -1)
+    # vertical columns of short strokes standing in for text
+    for col in range(cx + bw // 5, cx - bw // 4, -14):
+        for row in range(cy - bh // 4, cy + bh // 4, 12):
+            if rng.rand() < 0.8:
+                cv2.line(page, (col, row), (col + rng.randint(-4, 5), row + 8), (0, 0, 0), 2)
+
+def recorded_frames(frames_dir):
+    from PIL import Image
+    paths = sorted(p for ext in ('png', 'jpg', 'jpeg', 'webp') for p in glob.glob(os.path.join(frames_dir, f'*.{ext}')))
+    return [Image.open(p).convert('RGB') for p in paths]
+
+def summarize(samples: dict) -> dict:
+    return {stage: dict(p50_ms=1000 * percentile(v, 50), p95_ms=1000 * percentile(v, 95)) for stage, v in samples.items() if v}
+
+def make_engine(models, args):
+    from bubble_logic import BubbleTranslatorManager, TranslationEngine
+
+    manager = BubbleTranslatorManager()
+    manager.set_models(models)
+    manager.set_decoding_profile(args.profile)
+    manager.set_progressive_rendering(not args.no_progressive)
+    manager.set_render_images(not getattr(args, 'text_only', False))
+    return TranslationEngine(None, 0, manager, frame_budget=0) # no budget, every bubble gets processed
+
+def run_engine(engine, frames) -> dict:
+    from translation_logic import TRANSLATION_CACHE
+    from cache_logic import OCR_CACHE, DETECTION_CACHE
+
+    samples = {}
+    start_all = time.perf_counter()
+    for frame in frames:
+        start = time.perf_counter()
+        engine._handle_frame(frame)
+        samples.setdefault('frame', []).append(time.perf_counter() - start)
+        for stage, seconds in engine.last_timings.items():
+            samples.setdefault(stage, []).append(seconds)
+    total = time.perf_counter() - start_all
+    count = len(samples.get('frame', []))
+    return dict(stages=summarize(samples), fps=count / total if total else 0.0, frames=count,
+                fuzzy_saved=engine.fuzzy_index.saved, cache_hits=TRANSLATION_CACHE.hits,
+                ocr_cache=OCR_CACHE.stats(), detection_cache=DETECTION_CACHE.stats())
+
+def bench_engine(frames, models, args) -> dict:
+    engine = make_engine(models, args)
+    return run_engine(engine, (frame.copy() for _ in range(args.repeats) for frame in frames))
+
+def bench_snipper(frames, bubble_boxes, models, args) -> dict:
+    from snipper_logic import read_and_translate, _get_mean_color_and_overlay_text
+
+    snips = []
+    for frame, boxes in zip(frames, bubble_boxes):
+        w, h = frame.size
+        for box in boxes or [(w // 4, h // 4, 3 * w // 4, 3 * h // 4)]:
+            snips.append(frame.crop(box))
+
+    samples = {}
+    for _ in range(args.repeats):
+        for snip in snips:
+            # the shipped read path, page store lookup included when --page-store is given
+            start = time.perf_counter()
+            _, translated = read_and_translate(snip, models, args.snip_profile)
+            samples.setdefault('read_translate', []).append(time.perf_counter() - start)
+
+            stage_start = time.perf_counter()
+            _get_mean_color_and_overlay_text(snip, translated)
+            samples.setdefault('render', []).append(time.perf_counter() - stage_start)
+            samples.setdefault('snip', []).append(time.perf_counter() - start)
+    return dict(stages=summarize(samples), snips=len(samples.get('snip', [])))
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for path in ('engine', 'snipper'):
+        for stage, now in report[path]['stages'].items():
+            before = baseline.get(path, {}).get('stages', {}).get(stage)
+            if not before: continue
+            for key in ('p50_ms', 'p95_ms'):
+                # tiny stages are all noise, 1 ms floor
+                if now[key] > max(before[key] * (1 + tolerance), before[key] + 1.0):
+                    regressions.append(f"{path}.{stage}.{key}: {before[key]:.1f} -> {now[key]:.1f} ms")
+    if 'fps' in baseline.get('engine', {}) and report['engine']['fps'] < baseline['engine']['fps'] * (1 - tolerance):
+        regressions.append(f"engine.fps: {baseline['engine']['fps']:.2f} -> {report['engine']['fps']:.2f}")
+    return regressions
+
+def print_report(report: dict):
+    for path in ('engine', 'snipper'):
+        print(f"\n[{path}]")
+        print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}")
+        for stage, row in report[path]['stages'].items():
+            print(f"{stage:<12}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    print(f"\nengine: {report['engine']['frames']} frames, {report['engine']['fps']:.2f} frames/s")
+    print(f"translations saved: {report['engine']['fuzzy_saved']} by fuzzy OCR matching, {report['engine']['cache_hits']} cache hits")
+    print(f"snipper: {report['snipper']['snips']} snips")
+    print(f"OCR cache: {report['ocr_cache']['hits']} hits ({report['ocr_cache']['near_hits']} near), {report['ocr_cache']['misses']} misses")
+    detection = report['engine']['detection_cache']
+    print(f"detection cache: {detection['hits']} hits, {detection['misses']} misses, {detection['mb']:.2f} MB")
+    print(f"peak RSS: {report['peak_rss_mb']:.0f} MB")
+
+def configure_caches(args):
+    # every run starts cold, entries left from an earlier part of the process would count as hits
+    from translation_logic import TRANSLATION_CACHE
+    from cache_logic import OCR_CACHE, DETECTION_CACHE
+
+    TRANSLATION_CACHE.clear()
+    OCR_CACHE.clear()
+    if args.ocr_distance is not None: OCR_CACHE.max_distance = args.ocr_distance
+    if args.no_ocr_cache: OCR_CACHE.max_entries = 0
+    DETECTION_CACHE.clear()
+    if args.no_detection_cache: DETECTION_CACHE.max_bytes = 0
+    if getattr(args, 'page_store', None):
+        from store_logic import PAGE_STORE
+        # a fresh file, a store left from an earlier run would turn the whole benchmark into lookups
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.page_store + suffix): os.remove(args.page_store + suffix)
+        PAGE_STORE.open(args.page_store)
+
+def bench_frames(args):
+    from cache_logic import OCR_CACHE
+
+    frames, bubble_boxes = synthetic_frames(args.synthetic, args.width, args.height, args.seed)
+    if args.frames_dir:
+        recorded = recorded_frames(args.frames_dir)
+        frames += recorded
+        bubble_boxes += [[] for _ in recorded]
+    if not frames: sys.exit("No frames to run")
+
+    models = load_backend(args)
+    configure_caches(args)
+    report = dict(
+        backend=args.backend,
+        engine=bench_engine(frames, models, args),
+        snipper=bench_snipper(frames, bubble_boxes, models, args),
+        ocr_cache=OCR_CACHE.stats(),
+    )
+    report['peak_rss_mb'] = peak_rss_mb()
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+def bench_replay(args):
+    from capture_logic import open_capture_source
+
+    source = open_capture_source(args.path, speed=args.speed)
+    engine = make_engine(load_backend(args), args)
+    configure_caches(args)
+    frames = iter(source.grab, None)
+    report = run_engine(engine, frames)
+    source.close()
+
+    print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}")
+    for stage, row in report['stages'].items():
+        print(f"{stage:<12}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    print(f"\n{report['frames']} frames processed, {getattr(source, 'dropped', 0)} skipped, {report['fps']:.2f} frames/s")
+    print(f"translations saved: {report['fuzzy_saved']} by fuzzy OCR matching, {report['cache_hits']} cache hits")
+    print(f"OCR cache: {report['ocr_cache']['hits']} hits ({report['ocr_cache']['near_hits']} near), {report['ocr_cache']['misses']} misses")
+    print(f"detection cache: {report['detection_cache']['hits']} hits, {report['detection_cache']['misses']} misses, {report['detection_cache']['mb']:.2f} MB")
+    print(f"peak RSS: {peak_rss_mb():.0f} MB")
+
+def bench_text_change(args):
+    """Each page goes through live mode as is, re-captured with noise and with one bubble's text redrawn.
+
+    The noisy copy may reuse the page's results, the redrawn one has to be read again, in the running region and
+    from the page store. Exits 1 when a redrawn page was served the old text.
+    """
+    import tempfile
+    import numpy as np
+    from PIL import Image
+    from store_logic import PAGE_STORE
+
+    if not args.page_store: args.page_store = os.path.join(tempfile.mkdtemp(), 'pages.sqlite')
+    models = load_backend(args)
+    configure_caches(args)
+    frames, bubble_boxes = synthetic_frames(args.synthetic, args.width, args.height, args.seed)
+    rng = np.random.RandomState(args.seed)
+
+    def engine():
+        # stub OCR reads noise as other text, a background re-read would drop the stored page the check looks for
+        engine = make_engine(models, args)
+        engine.manager.set_revalidate_pages(False)
+        return engine
+
+    failures = []
+    for i, (page, boxes) in enumerate(zip(frames, bubble_boxes), 1):
+        if not boxes: continue
+        noise = rng.randint(-1, 2, size=(page.height, page.width, 3))
+        noisy = Image.fromarray(np.clip(np.asarray(page, dtype=np.int16) + noise, 0, 255).astype(np.uint8))
+        redrawn = []
+        for _ in range(2):
+            pixels = np.array(page)
+            draw_bubble(pixels, boxes[0], rng)
+            redrawn.append(Image.fromarray(pixels))
+
+        # the running region, the noisy copy counts as unchanged, the redrawn page must not
+        live = engine()
+        for frame in (page, noisy, redrawn[0]):
+            live._handle_frame(frame)
+        if live.frames_unchanged != 1:
+            failures.append(f"page {i}: {live.frames_unchanged} of noisy and redrawn copies skipped as unchanged, expected 1")
+
+        # a new region on a stored page, the noisy copy is a store hit, the other redrawn page a miss
+        hits, misses = PAGE_STORE.hits, PAGE_STORE.misses
+        engine()._handle_frame(noisy)
+        if PAGE_STORE.hits != hits + 1:
+            failures.append(f"page {i}: noisy copy not found in the page store")
+        engine()._handle_frame(redrawn[1])
+        if PAGE_STORE.misses != misses + 1:
+            failures.append(f"page {i}: redrawn page served from the page store")
+
+    print(PAGE_STORE.report())
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"{len(frames)} pages: noisy copies reused, pages with a redrawn bubble translated again")
+
+def run_concurrent_workload(frames, snips, models, args) -> float:
+    """Live mode over every frame while snips are translated next to it, returns the wall time."""
+    import threading
+    from translation_logic import TRANSLATION_CACHE
+    from cache_logic import OCR_CACHE, DETECTION_CACHE
+    from snipper_logic import read_and_translate
+
+    # caches would turn every run after the first into lookups
+    TRANSLATION_CACHE.clear()
+    OCR_CACHE.clear()
+    DETECTION_CACHE.clear()
+
+    engine = make_engine(models, args)
+    def snip_loop():
+        for snip in snips:
+            read_and_translate(snip, models, args.snip_profile)
+
+    start = time.perf_counter()
+    snipper = threading.Thread(target=snip_loop)
+    snipper.start()
+    run_engine(engine, (frame.copy() for frame in frames))
+    snipper.join()
+    return time.perf_counter() - start
+
+def bench_threads(args):
+    from translation_logic import TRANSLATION_CACHE
+    from cache_logic import OCR_CACHE, DETECTION_CACHE
+    from threads_logic import THREAD_BUDGET, STAGES
+
+    if args.threads: THREAD_BUDGET.configure(total=args.threads)
+    frames, bubble_boxes = synthetic_frames(args.synthetic, args.width, args.height, args.seed)
+    snips = [frame.crop(box) for frame, boxes in zip(frames, bubble_boxes) for box in boxes]
+    models = load_backend(args)
+    args.text_only, args.no_progressive = True, True # model stages only
+    TRANSLATION_CACHE.max_entries, OCR_CACHE.max_entries, DETECTION_CACHE.max_bytes = 0, 0, 0
+
+    total = THREAD_BUDGET.total
+    candidates = sorted({n for n in (1, 2, 4, 8, 16, total // 2, total) if 1 <= n <= total})
+    print(f"{total} cores, candidates per stage: {candidates}")
+    print(f"{'detect':>8}{'ocr':>6}{'mt':>6}{'wall s':>10}")
+
+    results = {}
+    def measure(split):
+        key = tuple(split[s] for s in STAGES)
+        if key not in results:
+            THREAD_BUDGET.configure(split=split)
+            results[key] = min(run_concurrent_workload(frames, snips, models, args) for _ in range(args.repeats))
+            print(f"{key[0]:>8}{key[1]:>6}{key[2]:>6}{results[key]:>10.2f}")
+        return results[key]
+
+    # coordinate descent from the balanced split, a full grid takes too long with real models
+    best = {stage: max(1, total // 2) for stage in STAGES}
+    best_time = measure(best)
+    for _ in range(args.rounds):
+        improved = False
+        for stage in STAGES:
+            for count in candidates:
+                trial = dict(best, **{stage: count})
+                seconds = measure(trial)
+                if seconds < best_time * 0.98: # ignore noise level wins
+                    best, best_time, improved = trial, seconds, True
+        if not improved: break
+
+    split = ",".join(f"{stage}={best[stage]}" for stage in STAGES)
+    print(f"\nbest split: --thread-split {split} ({best_time:.2f} s)")
+
+def evict_from_page_cache(root) -> int:
+    # closest thing to a cold start without root, the kernel drops the clean cached pages of these files
+    if not hasattr(os, 'posix_fadvise'): return 0
+    count = 0
+    for folder, _, files in os.walk(root):
+        for name in files:
+            try:
+                fd = os.open(os.path.join(folder, name), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                count += 1
+            finally:
+                os.close(fd)
+    return count
+
+def startup_probe(args):
+    # runs in a fresh interpreter started by bench_startup, prints one JSON line
+    start = time.perf_counter()
+    from model_logic import load_models, process_rss_mb
+    imported = time.perf_counter()
+    models = load_models(snapshot_dir=None if args.no_snapshot else args.snapshot_dir)
+    loaded = time.perf_counter()
+    if not models: sys.exit("Models could not be loaded")
+
+    components = {key: times[0] for key, times in models.load_times.items()}
+    for pair, times in models['translators'].load_times.items():
+        components['translator'] = times[0]
+    import psutil
+    memory = psutil.Process().memory_full_info()
+    print(json.dumps(dict(imports=imported - start, load=loaded - imported, total=loaded - start, components=components,
+                          rss_mb=process_rss_mb(), uss_mb=memory.uss / (1024 * 1024))))
+
+def bench_startup(args):
+    import subprocess
+    from model_logic import TRANSLATION_MODEL_PATH, SNAPSHOT_PATH, snapshot_available
+
+    def probe(no_snapshot, cold):
+        if cold: evict_from_page_cache(TRANSLATION_MODEL_PATH)
+        cmd = [sys.executable, os.path.abspath(__file__), 'startup-probe', '--snapshot-dir', SNAPSHOT_PATH]
+        if no_snapshot: cmd.append('--no-snapshot')
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        return json.loads(out.strip().splitlines()[-1])
+
+    modes = [('checkpoint', True)]
+    if snapshot_available('ocr', SNAPSHOT_PATH):
+        modes.append(('snapshot', False))
+    else:
+        print(f"no snapshot in {SNAPSHOT_PATH}, run `python main.py --compile-snapshot` to compare")
+
+    print(f"{'mode':<12}{'cold s':>8}{'warm s':>8}{'imports':>9}{'ocr':>7}{'bubble':>8}{'mt':>7}{'RSS MB':>8}{'USS MB':>8}")
+    for name, no_snapshot in modes:
+        cold = probe(no_snapshot, cold=True)
+        warm = [probe(no_snapshot, cold=False) for _ in range(args.repeats)]
+        best = min(warm, key=lambda r: r['total'])
+        c = best['components']
+        print(f"{name:<12}{cold['total']:>8.2f}{statistics.median(r['total'] for r in warm):>8.2f}{best['imports']:>9.2f}"
+              f"{c.get('ocr', 0):>7.2f}{c.get('bubble', 0):>8.2f}{c.get('translator', 0):>7.2f}{best['rss_mb']:>8.0f}{best['uss_mb']:>8.0f}")
+
+def latency_summary(values) -> dict:
+    return dict(count=len(values), p50_ms=1000 * percentile(values, 50), p95_ms=1000 * percentile(values, 95),
+                p99_ms=1000 * percentile(values, 99), max_ms=1000 * max(values, default=0.0))
+
+def load_pages(args):
+    # pages every region cycles through, a recorded session or image folder when given
+    if args.source:
+        from capture_logic import open_capture_source
+        source = open_capture_source(args.source, speed=0)
+        pages = list(iter(source.grab, None))
+        source.close()
+        if not pages: sys.exit(f"No frames in {args.source}")
+        return pages, [[] for _ in pages]
+    return synthetic_frames(args.synthetic, args.width, args.height, args.seed)
+
+def make_paced_source(pages, fps, hold, duration, offset):
+    from capture_logic import _TimedFrames
+
+    class PagedFrames(_TimedFrames):
+        """Captures at a fixed rate, each page stays on screen for hold frames, late frames are dropped."""
+        def _count(self): return max(1, int(duration * fps))
+        def _timestamp(self, i): return i / fps
+        def _load(self, i): return pages[(i // hold + offset) % len(pages)].copy()
+
+    return PagedFrames(speed=1.0)
+
+def bench_load(args):
+    """Live regions, snip bursts and background translations together for a fixed time, headless."""
+    import threading
+    import queue
+    from bubble_logic import BubbleTranslatorManager
+    from snipper_logic import SnippingHotkeyManager
+    import translation_logic
+    from model_logic import process_rss_mb
+
+    pages, bubble_boxes = load_pages(args)
+    snips = [page.crop(box) for page, boxes in zip(pages, bubble_boxes) for box in boxes]
+    if not snips:
+        snips = [page.crop((w // 4, h // 4, 3 * w // 4, 3 * h // 4)) for page in pages for w, h in [page.size]]
+    models = load_backend(args)
+    configure_caches(args)
+
+    messages = []
+    manager = BubbleTranslatorManager()
+    manager.set_models(models)
+    manager.set_max_regions(args.regions)
+    manager.set_decoding_profile(args.profile)
+    manager.set_render_images(not args.text_only)
+    manager.set_gui_callbacks(messages.append, lambda data: None, lambda: None)
+    snipper = SnippingHotkeyManager() # no listeners, snips are fed directly
+    snipper.set_models(models)
+    snipper.set_decoding_profile(args.snip_profile)
+    snipper.set_gui_output_callback(messages.append)
+
+    stop = threading.Event()
+    latencies = {} # region id -> seconds per changed frame
+    sources = {}
+    def start_region(n):
+        source = make_paced_source(pages, args.region_fps, args.page_hold, args.duration, offset=n)
+        engine = manager.start_capture_source(source, delay_seconds=0)
+        samples = latencies.setdefault(engine.region_id, [])
+        handle_frame = engine._handle_frame
+        def timed_handle_frame(capture):
+            unchanged = engine.frames_unchanged
+            start = time.perf_counter()
+            handle_frame(capture)
+            if engine.frames_unchanged == unchanged: samples.append(time.perf_counter() - start)
+        engine._handle_frame = timed_handle_frame
+        sources[engine.region_id] = source
+        return engine
+    # snips queue up like repeated hotkey presses, past the queue limit they are dropped like presses during a snip
+    snip_queue = queue.Queue()
+    snip_stats = dict(requested=0, dropped=0, latencies=[])
+    def snip_worker():
+        while True:
+            item = snip_queue.get()
+            if item is None: return
+            requested_at, img = item
+            snipper.translate_capture(img) # what the hotkey runs once the region is grabbed
+            snip_stats['latencies'].append(time.perf_counter() - requested_at)
+    def snip_bursts():
+        rng = random.Random(args.seed)
+        while not stop.wait(args.burst_interval):
+            for _ in range(args.burst_size):
+                snip_stats['requested'] += 1
+                if snip_queue.qsize() > args.snip_queue:
+                    snip_stats['dropped'] += 1
+                    continue
+                snip_queue.put((time.perf_counter(), rng.choice(snips)))
+    batch_latencies = []
+    def batch_translation():
+        # folder translation next to live mode, uncached so every sentence is a model call
+        sentences = [text for text, _ in MT_SENTENCES]
+        interval = 1.0 / args.batch_rate
+        i = 0
+        while not stop.wait(interval):
+            start = time.perf_counter()
+            translation_logic.translate_text(sentences[i % len(sentences)], models, profile=args.snip_profile, cache=None)
+            batch_latencies.append(time.perf_counter() - start)
+            i += 1
+
+    timeline = []
+    def sample():
+        t0 = time.perf_counter()
+        while not stop.wait(args.sample_interval):
+            timeline.append(dict(t=round(time.perf_counter() - t0, 2), rss_mb=round(process_rss_mb(), 1),
+                                 backend_queue=manager.backend.depth(), snip_queue=snip_queue.qsize(),
+                                 frames={region: len(samples) for region, samples in latencies.items()}))
+
+    engines = [start_region(n) for n in range(args.regions)]
+    threads = [threading.Thread(target=fn, daemon=True) for fn, on in
+               ((sample, True), (snip_worker, True), (snip_bursts, args.burst_size > 0), (batch_translation, args.batch_rate > 0)) if on]
+    rss_start = process_rss_mb()
+    start = time.perf_counter()
+    for thread in threads: thread.start()
+    for engine in engines: engine.thread.join(args.duration + 60)
+    stop.set()
+    snip_queue.put(None)
+    for thread in threads: thread.join(60)
+    wall = time.perf_counter() - start
+    region_report = manager.region_report() if any(e.is_running() for e in engines) else ""
+    manager.stop_all_regions(wait=True)
+
+    report = dict(
+        scenario=dict(backend=args.backend, stub_timings=args.stub_timings if args.backend == 'stub' else None, regions=args.regions,
+                      region_fps=args.region_fps, page_hold=args.page_hold, duration=args.duration, burst_size=args.burst_size,
+                      burst_interval=args.burst_interval, snip_queue=args.snip_queue, batch_rate=args.batch_rate,
+                      source=args.source, text_only=args.text_only),
+        wall_s=wall,
+        regions={},
+        snips=dict(requested=snip_stats['requested'], dropped=snip_stats['dropped'], **latency_summary(snip_stats['latencies'])),
+        batch=latency_summary(batch_latencies),
+        backend=dict(batches=manager.backend.batches, batched_jobs=manager.backend.batched_jobs,
+                     max_queue=max((s['backend_queue'] for s in timeline), default=0)),
+        memory=dict(start_mb=rss_start, end_mb=process_rss_mb(), peak_mb=peak_rss_mb(),
+                    max_sampled_mb=max((s['rss_mb'] for s in timeline), default=0.0)),
+        timeline=timeline,
+    )
+    for engine in engines:
+        source = sources[engine.region_id]
+        captured = engine.frames_processed
+        report['regions'][str(engine.region_id)] = dict(
+            captured=captured, changed=len(latencies[engine.region_id]), unchanged=engine.frames_unchanged, dropped=source.dropped,
+            fps=captured / wall if wall else 0.0, **latency_summary(latencies[engine.region_id]))
+    print_load_report(report)
+    if region_report: print(region_report)
+
+    if args.save_report:
+        with open(args.save_report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"report saved to {args.save_report}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_load_reports(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+def print_load_report(report: dict):
+    print(f"{'':<10}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'fps':>7}{'dropped':>9}")
+    rows = [(f"region {region}", row, f"{row['fps']:.2f}", row['dropped']) for region, row in report['regions'].items()]
+    rows.append(("snips", report['snips'], "", report['snips']['dropped']))
+    if report['batch']['count']: rows.append(("batch mt", report['batch'], "", ""))
+    for name, row, fps, dropped in rows:
+        print(f"{name:<10}{row['count']:>7}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}{fps:>7}{dropped:>9}")
+    unchanged = sum(row['unchanged'] for row in report['regions'].values())
+    memory = report['memory']
+    print(f"\n{unchanged} unchanged frames skipped, max backend queue {report['backend']['max_queue']}, "
+          f"{report['backend']['batched_jobs']} detections in {report['backend']['batches']} batched calls")
+    print(f"RSS {memory['start_mb']:.0f} -> {memory['end_mb']:.0f} MB, peak {memory['peak_mb']:.0f} MB")
+
+def compare_load_reports(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    if report['scenario'] != baseline.get('scenario'):
+        return ["scenario differs from the baseline, the reports are not comparable"]
+    regressions = []
+    paths = [(f"regions.{region}", row, baseline.get('regions', {}).get(region)) for region, row in report['regions'].items()]
+    paths += [("snips", report['snips'], baseline.get('snips')), ("batch", report['batch'], baseline.get('batch'))]
+    for path, now, before in paths:
+        if not before or not now['count']: continue
+        for key in ('p50_ms', 'p95_ms'):
+            # tiny stages are all noise, 1 ms floor
+            if now[key] > max(before[key] * (1 + tolerance), before[key] + 1.0):
+                regressions.append(f"{path}.{key}: {before[key]:.1f} -> {now[key]:.1f} ms")
+        if now.get('dropped', 0) > before.get('dropped', 0) * (1 + tolerance) + 1:
+            regressions.append(f"{path}.dropped: {before['dropped']} -> {now['dropped']}")
+    if report['memory']['peak_mb'] > baseline['memory']['peak_mb'] * (1 + tolerance):
+        regressions.append(f"memory.peak_mb: {baseline['memory']['peak_mb']:.0f} -> {report['memory']['peak_mb']:.0f} MB")
+    return regressions
+
+def add_backend_args(parser):
+    parser.add_argument('--backend', choices=('stub', 'real'), default='stub', help="stub models with fixed timings or the local real ones")
+    parser.add_argument('--stub-timings', default=DEFAULT_STUB_TIMINGS, help="ms per call for stub models, mt is per beam")
+    parser.add_argument('--quantize', action='store_true', help="int8 translator for the real backend")
+    parser.add_argument('--ocr-jitter', type=float, default=0.0, help="chance a stub OCR read comes back slightly different")
+    parser.add_argument('--ocr-distance', type=int, help="hamming distance of crop hashes still counted as an OCR cache hit (default 8)")
+    parser.add_argument('--no-ocr-cache', action='store_true', help="run OCR on every crop")
+    parser.add_argument('--no-detection-cache', action='store_true', help="run bubble detection on every frame, even repeated pages")
+    parser.add_argument('--page-store', metavar='PATH', help="look up and save pages and snips in a fresh page store at PATH, like the app does")
+
+def main():
+    parser = argparse.ArgumentParser(description="Manga Translator benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    mt_quant = sub.add_parser('mt-quant', help="fp32 vs dynamic int8 translator on a fixed sentence set")
+    mt_quant.add_argument('--repeats', type=int, default=3)
+    mt_quant.add_argument('--threads', type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    mt_quant.add_argument('--profile', default='quality', help="decoding profile used for both models")
+    mt_quant.add_argument('-v', '--verbose', action='store_true', help="print every translation")
+    mt_quant.set_defaults(func=bench_mt_quant)
+
+    mt_profiles = sub.add_parser('mt-profiles', help="latency and chrF of every decoding profile")
+    mt_profiles.add_argument('--repeats', type=int, default=3)
+    mt_profiles.add_argument('--threads', type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    mt_profiles.add_argument('--quantize', action='store_true', help="benchmark the int8 translator")
+    mt_profiles.set_defaults(func=bench_mt_profiles)
+
+    frames = sub.add_parser('frames', help="per stage latency of live mode and snipper on fixed frames")
+    add_backend_args(frames)
+    frames.add_argument('--synthetic', type=int, default=8, help="number of generated pages")
+    frames.add_argument('--width', type=int, default=900)
+    frames.add_argument('--height', type=int, default=1200)
+    frames.add_argument('--seed', type=int, default=1234)
+    frames.add_argument('--frames-dir', help="extra recorded frames (png/jpg), e.g. saved live mode captures")
+    frames.add_argument('--repeats', type=int, default=2)
+    frames.add_argument('--profile', default='fast', help="decoding profile for live mode")
+    frames.add_argument('--snip-profile', default='quality', help="decoding profile for snips")
+    frames.add_argument('--no-progressive', action='store_true', help="emit only the final frame")
+    frames.add_argument('--text-only', action='store_true', help="structured results only, no rendering or encoding")
+    frames.add_argument('--baseline', help="compare against this report, exit 1 on regressions")
+    frames.add_argument('--save-baseline', help="write this run as a baseline report")
+    frames.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE, help="allowed slowdown before it counts as a regression")
+    frames.set_defaults(func=bench_frames)
+
+    threads = sub.add_parser('threads', help="search the detect/OCR/MT thread split with live mode and snips running together")
+    add_backend_args(threads)
+    threads.add_argument('--threads', type=int, default=0, help="total thread budget (0 = every available core)")
+    threads.add_argument('--synthetic', type=int, default=4, help="number of generated pages")
+    threads.add_argument('--width', type=int, default=900)
+    threads.add_argument('--height', type=int, default=1200)
+    threads.add_argument('--seed', type=int, default=1234)
+    threads.add_argument('--repeats', type=int, default=1, help="runs per split, the fastest counts")
+    threads.add_argument('--rounds', type=int, default=2, help="coordinate descent passes over the stages")
+    threads.add_argument('--profile', default='fast', help="decoding profile for live mode")
+    threads.add_argument('--snip-profile', default='quality', help="decoding profile for snips")
+    threads.set_defaults(func=bench_threads)
+
+    startup = sub.add_parser('startup', help="cold and warm model load time from checkpoints vs the compiled snapshot")
+    startup.add_argument('--repeats', type=int, default=3, help="warm starts per mode")
+    startup.set_defaults(func=bench_startup)
+
+    probe = sub.add_parser('startup-probe', help="one model load in this process, used by 'startup'")
+    probe.add_argument('--snapshot-dir')
+    probe.add_argument('--no-snapshot', action='store_true')
+    probe.set_defaults(func=startup_probe)
+
+    load = sub.add_parser('load', help="live regions, snip bursts and background translation together, latency, drops, queues and memory")
+    add_backend_args(load)
+    load.add_argument('--duration', type=float, default=20, help="seconds of load")
+    load.add_argument('--regions', type=int, default=2, help="live regions running at once")
+    load.add_argument('--region-fps', type=float, default=5, help="capture rate of each region, frames the region is too slow for are dropped")
+    load.add_argument('--page-hold', type=int, default=10, help="frames a page stays on screen before the region moves to the next")
+    load.add_argument('--burst-size', type=int, default=3, help="snips per burst, 0 = no snips")
+    load.add_argument('--burst-interval', type=float, default=4, help="seconds between snip bursts")
+    load.add_argument('--snip-queue', type=int, default=2, help="snips that may wait, more are dropped")
+    load.add_argument('--batch-rate', type=float, default=0, help="uncached background translations per second, e.g. a folder being translated")
+    load.add_argument('--sample-interval', type=float, default=0.5, help="seconds between memory and queue samples")
+    load.add_argument('--source', help="recording folder, video or image folder the regions cycle through instead of generated pages")
+    load.add_argument('--synthetic', type=int, default=6, help="number of generated pages")
+    load.add_argument('--width', type=int, default=900)
+    load.add_argument('--height', type=int, default=1200)
+    load.add_argument('--seed', type=int, default=1234)
+    load.add_argument('--profile', default='fast', help="decoding profile for live mode")
+    load.add_argument('--snip-profile', default='quality', help="decoding profile for snips and background translations")
+    load.add_argument('--text-only', action='store_true', help="structured results only, no rendering or encoding")
+    load.add_argument('--save-report', help="write the report, timeline included, as JSON")
+    load.add_argument('--baseline', help="compare against a saved report of the same scenario, exit 1 on regressions")
+    load.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE, help="allowed slowdown before it counts as a regression")
+    load.set_defaults(func=bench_load)
+
+    replay = sub.add_parser('replay', help="throughput of live mode on a recorded session, video or image folder")
+    add_backend_args(replay)
+    replay.add_argument('path', help="recording folder (--record), video file, image folder or glob")
+    replay.add_argument('--speed', type=float, default=0, help="0 = as fast as possible, 1 = recorded speed (late frames are skipped)")
+    replay.add_argument('--profile', default='fast', help="decoding profile for live mode")
+    replay.add_argument('--no-progressive', action='store_true', help="emit only the final frame")
+    replay.set_defaults(func=bench_replay)
+
+    text_change = sub.add_parser('text-change', help="pages that differ only in bubble text must each be translated, exit 1 otherwise")
+    add_backend_args(text_change)
+    text_change.add_argument('--synthetic', type=int, default=6, help="number of generated pages")
+    text_change.add_argument('--width', type=int, default=900)
+    text_change.add_argument('--height', type=int, default=1200)
+    text_change.add_argument('--seed', type=int, default=1234)
+    text_change.add_argument('--profile', default='fast', help="decoding profile for live mode")
+    text_change.set_defaults(func=bench_text_change, no_progressive=False)
+
+    args = parser.parse_args()
+    os.chdir(BASE_DIR) # fonts and models are looked up relative to the repo
+    os.environ.setdefault('HF_HUB_OFFLINE', '1') # benchmarks never touch the network
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,38 @@
 import tkinter as tk
-from pynput import keyboard
-from PIL import ImageGrab, Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont
 import threading
 import time
 import os
-import cv2
 import numpy as np
 import io 
 import warnings
+from collections import OrderedDict
+from translation_logic import translate_text, normalize_ocr_text, edit_distance, current_language_pair, has_translator, TranslationCancelled, FuzzyTranslationIndex, DEFAULT_CONTINUOUS_PROFILE, FUZZY_MAX_RATIO
+from capture_logic import ScreenCapture, RecordingSource, PageReader, new_recording_dir
+from result_logic import BubbleResult, FrameResult
+from cache_logic import OCR_CACHE, DETECTION_CACHE, crop_hash, crops_match, frame_fingerprint, same_frame
+from mask_logic import RleMask
+from hotkey_logic import HOTKEYS
+from backend_logic import SharedBackend, RegionStopped
+from store_logic import PAGE_STORE, page_variant
+from profiling_logic import MEMORY_PROFILER
+from prefetch_logic import PrefetchScheduler, PREFETCH_PAGES, PREFETCH_MEMORY_MB, PREFETCH_CPU_SHARE, PREFETCH_REGION
 
 warnings.filterwarnings('ignore')
 
 #globals
 DELAY_SECONDS = 0.1   
 CUSTOM_FONT_PATH = './fonts/PermanentMarker-Regular.ttf'
+PATCH_MARGIN = 4
+FRAME_BUDGET_SECONDS = 1.5 # bubbles left after this carry over to the next frame
+TRACK_IOU = 0.5 # boxes overlapping at least this much are the same bubble
+TRACK_MAX_MISSED = 3 # frames a bubble may go undetected before its track is dropped
+DETECT_CONF = 0.4
+TRANSLATION_ERROR = "[TRANSLATION ERROR]"
+MAX_REGIONS = 1 # live regions running at once, starting one more stops the oldest
+VALIDATED_PAGES = 256 # stored pages remembered as re-read, the oldest may be re-read again
 
 
-
-def keys_to_pynput_set(key_strings: list[str]) -> set:
-    pynput_set = set()
-    for key_str in key_strings:
-        key_upper = key_str.upper()
-        if key_upper == "CONTROL": pynput_set.add(keyboard.Key.ctrl)
-        elif key_upper == "SHIFT": pynput_set.add(keyboard.Key.shift)
-        elif key_upper == "ALT": pynput_set.add(keyboard.Key.alt)
-        elif key_upper == "ESCAPE": pynput_set.add(keyboard.Key.esc)
-        else:
-            try:
-                pynput_set.add(keyboard.KeyCode.from_char(key_str.lower()))
-            except ValueError:
-                if hasattr(keyboard.Key, key_str.lower()):
-                    pynput_set.add(getattr(keyboard.Key, key_str.lower()))
-    return pynput_set
-
 class SnippingTool(tk.Toplevel):
     def __init__(self, master):
         super().__init__(master)
@@ -92,117 +92,467 @@ class SnippingTool(tk.Toplevel):
         self.selection = None
         self.destroy()
 
+def box_iou(a, b) -> float:
+    ix = min(a[2], b[2]) - max(a[0], b[0])
+    iy = min(a[3], b[3]) - max(a[1], b[1])
+    if ix <= 0 or iy <= 0: return 0.0
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union
+
+
+class BubbleTracker:
+    """Gives bubbles a track id that stays the same while the box stays roughly in place."""
+    def __init__(self, iou_threshold=TRACK_IOU, max_missed=TRACK_MAX_MISSED):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self._tracks = {} # track id -> (box, frames missed)
+        self._next_id = 1
+
+    def update(self, bubbles):
+        # greedy matching, best overlaps first, pages rarely have more than a dozen bubbles
+        pairs = sorted(((box_iou(b.box, box), i, track_id)
+                        for i, b in enumerate(bubbles) for track_id, (box, _) in self._tracks.items()), reverse=True)
+        matched_tracks = set()
+        for iou, i, track_id in pairs:
+            if iou < self.iou_threshold: break
+            if bubbles[i].track_id is not None or track_id in matched_tracks: continue
+            bubbles[i].track_id = track_id
+            matched_tracks.add(track_id)
+
+        for track_id, (box, missed) in list(self._tracks.items()):
+            if track_id in matched_tracks: continue
+            if missed + 1 > self.max_missed: del self._tracks[track_id]
+            else: self._tracks[track_id] = (box, missed + 1)
+
+        for bubble in bubbles:
+            if bubble.track_id is None:
+                bubble.track_id = self._next_id
+                self._next_id += 1
+            self._tracks[bubble.track_id] = (bubble.box, 0)
+
+    def track_ids(self):
+        return self._tracks.keys()
+
+
 class TranslationEngine:
-    def __init__(self, crop_coords, delay_seconds, manager):
+    def __init__(self, crop_coords, delay_seconds, manager, frame_budget=FRAME_BUDGET_SECONDS, capture_source=None, region_id=0, background=False):
+        self.region_id = region_id # model calls go through manager.backend under this id
+        self.background = background # its model calls wait for every live region's, used for prefetching
         self.crop_coords = crop_coords
+        self.capture_source = capture_source or ScreenCapture(crop_coords)
         self.delay_seconds = delay_seconds
+        self.frame_budget = frame_budget
         self.manager = manager 
         
         self._stop_event = threading.Event()
         self.thread = threading.Thread(target=self._run_loop, daemon=True)
         self._is_running = True 
+        self._stop_requested_at = None
+        self.last_stop_latency = None # seconds from stop() until the loop went idle
+        self._carry_over = [] # boxes that ran out of frame budget, handled first next frame
+        self.last_timings = {} # stage -> seconds spent on the last frame
+        self.last_result = None # FrameResult of the last frame
+        self.frames_processed = 0
+        self.frames_unchanged = 0 # same pixels as the last translated frame, skipped
+        self.started_at = None
+        self._last_fingerprint = None
+        self._validated = OrderedDict() # LRU of stored pages already re-read this run, fingerprint -> None
+        self.tracker = BubbleTracker()
+        self.fuzzy_index = FuzzyTranslationIndex() # reuses translations while OCR text jitters
         
-        self.models = manager.MODELS 
         if not self.manager.MODELS_LOADED:
             manager.output_callback("ERROR: Translation models failed to load.")
 
+    @property
+    def models(self):
+        # read on every use, the manager only gets its models once they finished loading after the window opened
+        return self.manager.MODELS
+
     def start(self):
         self.thread.start()
 
-    def stop(self):
+    def stop(self, wait=False, timeout=1.0):
+        self._stop_requested_at = time.perf_counter()
         self._stop_event.set()
         self._is_running = False
-        self.manager.output_callback("Continuous translation stopped.")
+        if self.thread.is_alive(): self.manager.output_callback("Continuous translation stopped.")
+        if wait and self.thread.is_alive() and threading.current_thread() is not self.thread:
+            self.thread.join(timeout)
 
     def is_running(self):
         return self._is_running
+
+    def fps(self) -> float:
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return self.frames_processed / elapsed if elapsed else 0.0
         
     def _run_loop(self):
+        self.started_at = time.perf_counter()
         while not self._stop_event.is_set():
             if self._stop_event.wait(self.delay_seconds): break
 
+            start = time.perf_counter()
             try:
-                capture = ImageGrab.grab(bbox=self.crop_coords)
+                capture = self.capture_source.grab()
             except Exception as e:
                 self.manager.output_callback(f"Capture failed: {e}")
-                time.sleep(1)
+                self._stop_event.wait(1)
                 continue
+            capture_time = time.perf_counter() - start
 
-            final_pil = self._process_image(capture)
+            if capture is None:
+                self.manager.output_callback("Capture source finished.")
+                break
 
-            if not self._stop_event.is_set():
-                image_bytes = self.manager._pil_image_to_bytes(final_pil)
-                if self.manager.image_callback:
-                    self.manager.image_callback(image_bytes)
+            try:
+                self._handle_frame(capture)
+            except RegionStopped:
+                break # stop() came while a model call was still queued
+            except Exception as e:
+                # a bad frame is reported and skipped, it must not end the loop while it still counts as running
+                self.manager.output_callback(f"Frame failed: {e}")
+                self._last_fingerprint = None
+                self._stop_event.wait(1)
+                continue
+            self.last_timings['capture'] = capture_time
+            self.frames_processed += 1
+            MEMORY_PROFILER.on_frame() # samples every N frames with --memory-profile, nothing otherwise
                 
         self._is_running = False 
+        self.capture_source.close()
+        if self.fuzzy_index.saved:
+            self.manager.output_callback(f"Fuzzy OCR matching saved {self.fuzzy_index.saved} translations.")
+        if self._stop_requested_at is not None:
+            self.last_stop_latency = time.perf_counter() - self._stop_requested_at
+            self.manager.output_callback(f"Translation loop idle {self.last_stop_latency * 1000:.0f} ms after stop.")
+
+    def _handle_frame(self, capture):
+        # one captured frame through the pipeline and out to the GUI
+        # read once, the view can move to another region or rendering be switched off mid frame
+        displayed = self.manager.is_displayed(self)
+        render = displayed and self.manager.get_render_images()
+        # converted once, the same buffer is fingerprinted, processed and, when rendering, inpainted
+        start = time.perf_counter()
+        frame = np.array(capture) if render else np.asarray(capture)
+        convert_time = time.perf_counter() - start
+        fingerprint = frame_fingerprint(frame)
+        last = self.last_result
+        if last is not None and last.complete and same_frame(fingerprint, self._last_fingerprint) and (
+                fingerprint == self._last_fingerprint or crops_match(frame, [(b.box, b.crop_hash) for b in last.bubbles])):
+            # nothing moved in this region since its last full translation, no model time needed
+            self.frames_unchanged += 1
+            self.last_timings = {}
+            return
+        self._last_fingerprint = fingerprint
+
+        if not displayed:
+            # another region has the image view, this one reports its translations to the console
+            self._process_image(capture, render=False, fingerprint=fingerprint, frame=frame)
+            self._log_result(self.last_result)
+        elif not render:
+            self._process_image(capture, render=False, fingerprint=fingerprint, frame=frame) # text only, nothing to encode
+        elif self.manager.get_progressive_rendering():
+            streamed = []
+            def on_frame(pil_img):
+                streamed.append(True)
+                self._emit_image(pil_img)
+            final_pil = self._process_image(capture, on_frame=on_frame, on_patch=self._emit_patch, fingerprint=fingerprint, frame=frame)
+            if not streamed: self._emit_image(final_pil)
+        else:
+            self._emit_image(self._process_image(capture, fingerprint=fingerprint, frame=frame))
+        self.last_timings['convert'] = self.last_timings.get('convert', 0.0) + convert_time
+        if displayed: self._emit_result(self.last_result) # the result panel belongs to the shown region like the image
+
+    def _log_result(self, result):
+        if result is None or not result.bubbles or self._stop_event.is_set(): return
+        self.manager.output_callback(f"Region {self.region_id}:\n{result.to_text()}")
+
+    def _add_timing(self, stage, start):
+        self.last_timings[stage] = self.last_timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def _emit_image(self, pil_img):
+        if pil_img is None or self._stop_event.is_set(): return
+        start = time.perf_counter()
+        image_bytes = self.manager._pil_image_to_bytes(pil_img)
+        self._add_timing('encode', start)
+        if self.manager.image_callback:
+            self.manager.image_callback(image_bytes)
+
+    def _emit_result(self, result):
+        if result is None or self._stop_event.is_set(): return
+        if self.manager.result_callback:
+            self.manager.result_callback(result)
+
+    def _emit_patch(self, x, y, pil_img):
+        if self._stop_event.is_set(): return
+        start = time.perf_counter()
+        image_bytes = self.manager._pil_image_to_bytes(pil_img)
+        self._add_timing('encode', start)
+        if self.manager.patch_callback:
+            self.manager.patch_callback(x, y, image_bytes)
+
+    def _prioritize_carry_over(self, bubbles):
+        # bubbles that were skipped last frame go first so they can't starve
+        if not self._carry_over: return bubbles
+        def was_deferred(bubble):
+            x1, y1, x2, y2 = bubble.box
+            return any(x1 < cx2 and cx1 < x2 and y1 < cy2 and cy1 < y2 for cx1, cy1, cx2, cy2 in self._carry_over)
+        return sorted(bubbles, key=lambda b: not was_deferred(b))
         
-    def _process_image(self, capture_pil):
-        if not self.manager.MODELS_LOADED: return capture_pil
+    def _process_image(self, capture_pil, on_frame=None, on_patch=None, render=True, fingerprint=None, frame=None):
+        # on_frame gets the frame with every bubble covered, on_patch(x, y, img) each bubble once its text is drawn
+        # the structured result is left in last_result, render=False only fills that and returns None
+        # frame is capture_pil already converted, it has to be a writable copy when rendering
+        # returns None as well when the engine was stopped mid frame
+        self.last_timings = {}
+        self.last_result = None
+        unchanged = capture_pil if render else None
+        if not self.manager.MODELS_LOADED: return unchanged
+        deadline = time.perf_counter() + self.frame_budget if self.frame_budget else None
+
+        # one RGB buffer for the whole frame, it is also what gets inpainted, capture_pil stays untouched for crops
+        start = time.perf_counter()
+        if frame is None: frame = np.array(capture_pil) if render else np.asarray(capture_pil)
+        self._add_timing('convert', start)
+
+        # page translated before, in this or an earlier session
+        if fingerprint is None: fingerprint = frame_fingerprint(frame)
+        variant = page_variant(self.models, self.manager.get_decoding_profile())
+        start = time.perf_counter()
+        stored = PAGE_STORE.get(fingerprint, variant, frame)
+        self._add_timing('store', start)
+        if stored is not None:
+            return self._show_stored(capture_pil, frame, fingerprint, stored, render)
+
+        result = self._detect_bubbles(frame, fingerprint)
+        if self._stop_event.is_set(): return None
+        if result is None: return unchanged
+        self.last_result = result
+        if not result.bubbles: return unchanged
+
+        pil_draw_img = None
+        if render:
+            # cover original text first so it can be shown before any text is read
+            start = time.perf_counter()
+            pil_draw_img = self._cover_bubbles(frame, result.bubbles)
+            self._add_timing('fill', start)
+            if on_frame: on_frame(pil_draw_img)
+
+        # read, translate and draw bubble by bubble
+        deferred = []
+        h, w = frame.shape[:2]
+        for bubble in self._prioritize_carry_over(result.bubbles):
+            if self._stop_event.is_set(): return None
+            x1, y1, x2, y2 = bubble.box
+
+            if deadline and time.perf_counter() > deadline:
+                # out of budget, put the original bubble back and try it again next frame
+                if render:
+                    pil_draw_img.paste(capture_pil.crop(bubble.box), (x1, y1), Image.fromarray(bubble.mask.to_array()))
+                deferred.append(bubble.box)
+            else:
+                start = time.perf_counter()
+                # crop straight from the untouched capture, already RGB as MangaOcr wants it
+                bubble.ocr_text = OCR_CACHE.read(capture_pil.crop(bubble.box), self._read_crop)
+                bubble.timings['ocr'] = time.perf_counter() - start
+                self._add_timing('ocr', start)
+
+                start = time.perf_counter()
+                try:
+                    bubble.translation = self._translate_text(bubble.ocr_text, bubble.track_id)
+                except TranslationCancelled:
+                    return None
+                bubble.timings['translate'] = time.perf_counter() - start
+                self._add_timing('translate', start)
+                
+                if render:
+                    start = time.perf_counter()
+                    pil_draw_img = self._draw_text(pil_draw_img, bubble.translation, x1, y1, x2-x1, y2-y1)
+                    self._add_timing('draw', start)
+
+            if render and on_patch:
+                # little margin so the text stroke on the edges is included
+                px1, py1 = max(0, x1 - PATCH_MARGIN), max(0, y1 - PATCH_MARGIN)
+                px2, py2 = min(w, x2 + PATCH_MARGIN), min(h, y2 + PATCH_MARGIN)
+                on_patch(px1, py1, pil_draw_img.crop((px1, py1, px2, py2)))
+
+        self._carry_over = deferred
+        # a failed translation is tried again on the next frame and never stored, the translator may recover
+        failed = any(bubble.translation == TRANSLATION_ERROR for bubble in result.bubbles)
+        result.complete = not deferred and not failed
+        result.timings = self.last_timings
+        if result.complete: PAGE_STORE.put(fingerprint, variant, result)
+        return pil_draw_img
+
+    def translate_page(self, capture_pil, fingerprint=None, frame=None):
+        """Whole page through the models without drawing anything, the FrameResult also goes to the page store."""
+        self._process_image(capture_pil, render=False, fingerprint=fingerprint, frame=frame)
+        return self.last_result
+
+    def _show_stored(self, capture_pil, frame, fingerprint, stored, render):
+        # every model skipped, boxes, masks and translations all come from the store
+        stored.frame_id = self.frames_processed
+        self._track_bubbles(stored.bubbles)
+        self._carry_over = []
+        self.last_result = stored
+        pil_draw_img = None
+        if render:
+            start = time.perf_counter()
+            pil_draw_img = self._render_onto(frame, stored)
+            self._add_timing('draw', start)
+        stored.timings = self.last_timings
+        if fingerprint in self._validated:
+            self._validated.move_to_end(fingerprint)
+        elif self.manager.get_revalidate_pages():
+            self._validated[fingerprint] = None
+            if len(self._validated) > VALIDATED_PAGES: self._validated.popitem(last=False)
+            threading.Thread(target=self._revalidate, args=(capture_pil, fingerprint, stored), daemon=True).start()
+        return pil_draw_img
+
+    def _revalidate(self, capture_pil, fingerprint, stored):
+        # a fingerprint collision would show another page's text, reread the stored bubbles off the loop
+        # the OCR cache is skipped on purpose, it could hand back the same stale text
+        ocr = self.models['ocr']
+        for bubble in stored.bubbles:
+            if self._stop_event.is_set(): return
+            crop = capture_pil.crop(bubble.box)
+            try:
+                text = normalize_ocr_text(self._run_model('ocr', lambda: ocr(crop)))
+            except Exception:
+                return
+            known = normalize_ocr_text(bubble.ocr_text or "")
+            limit = max(1, int(len(known) * FUZZY_MAX_RATIO))
+            if edit_distance(text, known, limit) > limit:
+                PAGE_STORE.invalidate(fingerprint)
+                self._last_fingerprint = None # the next frame of this page goes through the models again
+                self.manager.output_callback("Stored page no longer matches, translating it again.")
+                return
+
+    def _run_model(self, stage, fn=None, payload=None):
+        return self.manager.backend.run(self.region_id, stage, fn, payload, background=self.background)
+
+    def _read_crop(self, crop):
+        ocr = self.models['ocr']
+        return self._run_model('ocr', lambda: ocr(crop))
+
+    def _detect_bubbles(self, frame, fingerprint=None):
+        # FrameResult with boxes and box local RleMasks, None if detection failed
+        h, w = frame.shape[:2]
+        result = FrameResult((w, h), frame_id=self.frames_processed)
+
+        # page seen before (flipping back and forth), YOLO can be skipped
+        start = time.perf_counter()
+        if fingerprint is None: fingerprint = frame_fingerprint(frame)
+        cached = DETECTION_CACHE.get(fingerprint, frame)
+        if cached is not None:
+            for box, mask, h in cached:
+                result.bubbles.append(BubbleResult(box, mask))
+                result.bubbles[-1].crop_hash = h
+            self._track_bubbles(result.bubbles)
+            self._add_timing('detect', start)
+            return result
 
-        # Prediction / look for bubbles
-        img_np = np.array(capture_pil)
-        img_cv2 = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-        original_cv2 = img_cv2.copy()
-        
         try:
-            results = self.models['bubble'].predict(source=img_cv2, conf=0.4, verbose=False)
+            # YOLO expects BGR, a reversed channel view is enough since its preprocessing copies anyway
+            # the backend may detect it together with other regions' frames
+            r = self._run_model('detect', payload=frame[..., ::-1])
+        except RegionStopped:
+            raise
         except Exception as e:
             self.manager.output_callback(f"YOLO prediction failed: {e}")
-            return capture_pil
+            return None
+        self._add_timing('detect', start)
 
-        if not results or not results[0].masks:
-            return capture_pil 
-            
-        r = results[0]
-        h, w = img_cv2.shape[:2]
-        
-        # Build Mask and translate data
-        full_mask = np.zeros((h, w), dtype=np.uint8)
-        overlays = [] # Store text and coords to draw later
-        
+        if r is None or not r.masks:
+            DETECTION_CACHE.put(fingerprint, [])
+            self._track_bubbles(result.bubbles)
+            return result
+
+        start = time.perf_counter()
+        # polygons already come in frame coordinates, filling them inside the box skips a frame sized resize per bubble
+        polygons = r.masks.xy
         for i, box in enumerate(r.boxes):
             x1, y1, x2, y2 = map(int, box.xyxy[0])
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
             if x1 >= x2 or y1 >= y2: continue
             
-            raw_mask = r.masks.data[i].cpu().numpy()
-            resized_mask = cv2.resize(raw_mask, (w, h), interpolation=cv2.INTER_LINEAR)
-            full_mask = cv2.bitwise_or(full_mask, (resized_mask > 0.5).astype(np.uint8) * 255)
+            mask = RleMask.from_polygons([polygons[i]], (x1, y1, x2, y2))
+            bubble = BubbleResult((x1, y1, x2, y2), mask)
+            bubble.crop_hash = crop_hash(frame, bubble.box) # before any inpainting, near matches of this frame check it
+            result.bubbles.append(bubble)
+        DETECTION_CACHE.put(fingerprint, result.bubbles)
+        self._track_bubbles(result.bubbles)
+        self._add_timing('mask', start)
+        return result
+
+    def _track_bubbles(self, bubbles):
+        self.tracker.update(bubbles)
+        self.fuzzy_index.retain(self.tracker.track_ids())
+
+    def _cover_bubbles(self, frame, bubbles):
+        # labels holds the 1-based bubble index of every bubble pixel, 0 is background
+        h, w = frame.shape[:2]
+        labels = np.zeros((h, w), dtype=np.uint16)
+        for i, bubble in enumerate(bubbles, 1):
+            x1, y1, x2, y2 = bubble.box
+            bubble.mask.paint(labels[y1:y2, x1:x2], i)
+
+        # every bubble with its own mean color
+        self._fill_bubbles(frame, labels, len(bubbles))
+        return Image.fromarray(frame)
+
+    def render_result(self, capture_pil, result):
+        """Draws a FrameResult onto its capture without touching any model."""
+        return self._render_onto(np.array(capture_pil), result)
+
+    def _render_onto(self, frame, result):
+        # frame is a writable RGB copy, it gets inpainted
+        pil_draw_img = self._cover_bubbles(frame, result.bubbles)
+        for bubble in result.bubbles:
+            if bubble.translation is None: continue
+            x1, y1, x2, y2 = bubble.box
+            pil_draw_img = self._draw_text(pil_draw_img, bubble.translation, x1, y1, x2-x1, y2-y1)
+        return pil_draw_img
 
-            crop = original_cv2[y1:y2, x1:x2]
-            pil_crop = Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
-            
-            ocr_text = self.models['ocr'](pil_crop)
-            translated_text = self._translate_text(ocr_text)
-            
-            overlays.append((translated_text, x1, y1, x2-x1, y2-y1))
+    def _fill_bubbles(self, frame, labels, bubble_count):
+        pixel_idx = np.flatnonzero(labels)
+        if not pixel_idx.size: return
 
-        # cover original text
-        mean_val = cv2.mean(original_cv2, mask=full_mask)
-        color = (int(mean_val[0]), int(mean_val[1]), int(mean_val[2]))
-        img_cv2[full_mask > 0] = color
-        
-        # draw text
-        pil_draw_img = Image.fromarray(cv2.cvtColor(img_cv2, cv2.COLOR_BGR2RGB))
-        
-        for text, x, y, w_box, h_box in overlays:
-            pil_draw_img = self._draw_text(pil_draw_img, text, x, y, w_box, h_box)
+        pixels = frame.reshape(-1, 3) # view, frame is contiguous
+        bubble_ids = labels.ravel()[pixel_idx].astype(np.intp)
+        bins = bubble_count + 1
 
-        return pil_draw_img
+        # one bincount over (bubble, channel) pairs gives every bubble's channel sums at once
+        channel_bins = (bubble_ids[:, None] * 3 + np.arange(3)).ravel()
+        sums = np.bincount(channel_bins, weights=pixels[pixel_idx].ravel(), minlength=bins * 3).reshape(bins, 3)
+        counts = np.bincount(bubble_ids, minlength=bins)
+        colors = (sums / np.maximum(counts, 1)[:, None]).astype(np.uint8)
 
-    def _translate_text(self, text):
-        try:
-            if not text.strip(): return ""
-            tokenizer = self.models['tokenizer']
-            model = self.models['translator']
-            device = self.models['device']
+        pixels[pixel_idx] = colors[bubble_ids] # single scatter write
 
-            
-            inputs = tokenizer(text, return_tensors="pt", padding=True).to(device)
-            translated = model.generate(**inputs, num_beams=5, no_repeat_ngram_size=2, length_penalty=2.0, max_length=150, early_stopping=True)
-            return tokenizer.decode(translated[0], skip_special_tokens=True)
+    def _translate_text(self, text, track_id=None):
+        text = normalize_ocr_text(text)
+        if not text: return ""
+        profile = self.manager.get_decoding_profile()
+        pair = current_language_pair(self.models)
+        variant = (pair, profile) # a new target language or profile must not reuse old translations
+
+        # same bubble as last frame and the text only jittered a bit, keep its translation
+        if track_id is not None:
+            reused = self.fuzzy_index.lookup(track_id, text, variant)
+            if reused is not None: return reused
+
+        try:
+            translation = self._run_model('mt', lambda: translate_text(
+                text, self.models, profile=profile, stop_event=self._stop_event, pair=pair))
+        except (TranslationCancelled, RegionStopped):
+            raise
         except Exception:
-            return "[TRANSLATION ERROR]"
+            return TRANSLATION_ERROR
+        if track_id is not None:
+            self.fuzzy_index.remember(track_id, text, variant, translation)
+        return translation
 
     def _draw_text(self, img, text, x, y, w, h):
         draw = ImageDraw.Draw(img)
@@ -295,45 +645,90 @@ class TranslationEngine:
 
 class BubbleTranslatorManager:
     def __init__(self):
-        self.root_tk = tk.Tk()
-        self.root_tk.withdraw()
+        self._root_tk = None # created on first use so the engine also runs headless
         
-        self.active_engine = None
-        self.current_keys = set()
-        self.listener = None
+        self.engines = {} # region id -> TranslationEngine, every running live region
+        self._next_region_id = 1
+        self._max_regions = MAX_REGIONS
+        self._display_region = None # newest region, the one shown in the image view
+        # all regions share one model worker, detection of frames from several regions is batched
+        self.backend = SharedBackend(batch_fns={'detect': self._predict_frames})
+        self.reader = None # PageReader of reader mode, turned with turn_page()
+        self.prefetcher = None
+        self._reader_region = None
         
         self._start_combo_list = ["Shift", "E"]
         self._stop_combo_list = ["Shift", "S"]
         self._stop_v2_combo_list = ["Escape"]
+        self._decoding_profile = DEFAULT_CONTINUOUS_PROFILE
+        self._recording_dir = None # live sessions are saved here for replay when set
+        self._progressive_rendering = True
+        self._render_images = True # False = structured results only, no image work
+        self._revalidate_pages = True # re-read pages shown from the page store once in the background
 
         self.output_callback = lambda text: None 
         self.image_callback = lambda data: None
+        self.patch_callback = lambda x, y, data: None
+        self.result_callback = lambda result: None
         self.hotkey_callback = lambda: None 
 
         self.MODELS = {}
         self.MODELS_LOADED = False
+        self._load_error = None # set once loading finished without usable models
     
+    @property
+    def root_tk(self):
+        if self._root_tk is None:
+            self._root_tk = tk.Tk()
+            self._root_tk.withdraw()
+        return self._root_tk
+
     def get_start_combination(self) -> list[str]: return self._start_combo_list
-    def set_start_combination(self, key_strings: list[str]): self._start_combo_list = key_strings
+    def set_start_combination(self, key_strings: list[str]):
+        self._start_combo_list = key_strings
+        HOTKEYS.register('live_start', key_strings, self._on_start_hotkey)
     def get_stop_combination(self) -> list[str]: return self._stop_combo_list
-    def set_stop_combination(self, key_strings: list[str]): self._stop_combo_list = key_strings
+    def set_stop_combination(self, key_strings: list[str]):
+        self._stop_combo_list = key_strings
+        HOTKEYS.register('live_stop', key_strings, self._on_stop_hotkey)
     def get_stop_v2_combination(self) -> list[str]: return self._stop_v2_combo_list
-    def set_stop_v2_combination(self, key_strings: list[str]): self._stop_v2_combo_list = key_strings
+    def set_stop_v2_combination(self, key_strings: list[str]):
+        self._stop_v2_combo_list = key_strings
+        HOTKEYS.register('live_stop_key', key_strings, self._on_stop_hotkey)
+    def get_decoding_profile(self) -> str: return self._decoding_profile
+    def set_decoding_profile(self, profile: str): self._decoding_profile = profile
+    def get_recording_dir(self): return self._recording_dir
+    def set_recording_dir(self, path): self._recording_dir = path
+    def get_progressive_rendering(self) -> bool: return self._progressive_rendering
+    def set_progressive_rendering(self, v: bool): self._progressive_rendering = v
+    def set_progressive_rendering_from_qt(self, s): self.set_progressive_rendering(s == 2)
+    def get_revalidate_pages(self) -> bool: return self._revalidate_pages
+    def set_revalidate_pages(self, v: bool): self._revalidate_pages = v
+    def set_revalidate_pages_from_qt(self, s): self.set_revalidate_pages(s == 2)
+    def get_max_regions(self) -> int: return self._max_regions
+    def set_max_regions(self, n: int): self._max_regions = max(1, n)
+    def get_render_images(self) -> bool: return self._render_images
+    def set_render_images(self, v: bool): self._render_images = v
+    def set_render_images_from_qt(self, s): self.set_render_images(s == 2)
+    def get_load_error(self): return self._load_error
+    def set_load_error(self, message): self._load_error = message
 
     def set_models(self,model_dict):
         self.MODELS = model_dict
 
-        if 'ocr' in self.MODELS and 'translator' in self.MODELS:
+        if 'ocr' in self.MODELS and has_translator(self.MODELS):
             self.MODELS_LOADED=True
             
         else:
             self.MODELS_LOADED=False
     
 
-    def set_gui_callbacks(self, output_callback, image_callback, hotkey_callback):
+    def set_gui_callbacks(self, output_callback, image_callback, hotkey_callback, patch_callback=None, result_callback=None):
         self.output_callback = output_callback
         self.image_callback = image_callback
         self.hotkey_callback = hotkey_callback 
+        if patch_callback: self.patch_callback = patch_callback
+        if result_callback: self.result_callback = result_callback
 
     def _pil_image_to_bytes(self, pil_image: Image.Image) -> bytes:
         if pil_image is None: return b''
@@ -345,70 +740,149 @@ class BubbleTranslatorManager:
             return b''
 
     def start_hotkey_listener(self):
-        if self.listener is None:
-            self.listener = keyboard.Listener(on_press=self._on_key_press, on_release=self._on_key_release)
-            self.listener.start()
+        # combos go to the shared hotkey service, the snipper's hotkey uses the same listener
+        self.set_start_combination(self._start_combo_list)
+        self.set_stop_combination(self._stop_combo_list)
+        self.set_stop_v2_combination(self._stop_v2_combo_list)
+        HOTKEYS.start()
 
     def stop_listeners(self):
-        self.stop_active_engine()
-        if self.listener:
-            self.listener.stop()
+        self.stop_all_regions()
+        HOTKEYS.stop()
         try:
-            self.root_tk.quit()
+            if self._root_tk: self._root_tk.quit()
         except Exception:
             pass 
         
-    def stop_active_engine(self):
-        if self.active_engine and self.active_engine.is_running():
-            self.active_engine.stop()
-            self.active_engine = None
+    def is_displayed(self, engine) -> bool:
+        # engines the manager didn't start (benchmarks) always render
+        return self._display_region is None or engine.region_id == self._display_region
+
+    def _predict_frames(self, frames):
+        # one YOLO call for the waiting frames of every region, one result per frame
+        results = self.MODELS['bubble'].predict(source=frames if len(frames) > 1 else frames[0], conf=DETECT_CONF, verbose=False)
+        return list(results) if results else [None] * len(frames)
+
+    def _prune_regions(self):
+        # regions whose capture source ran out stop on their own
+        for region_id, engine in list(self.engines.items()):
+            if not engine.is_running(): self.stop_region(region_id)
+
+    def stop_region(self, region_id, wait=False):
+        engine = self.engines.pop(region_id, None)
+        if engine is None: return
+        if region_id == self._reader_region: self._stop_prefetching()
+        if engine.is_running(): engine.stop()
+        self.backend.forget(region_id) # its queued model calls are dropped, not waited for
+        if wait and engine.thread.is_alive() and threading.current_thread() is not engine.thread:
+            engine.thread.join(1.0)
+        if self._display_region == region_id:
+            self._display_region = max(self.engines, default=None) # newest one left takes over the view
+
+    def stop_all_regions(self, wait=False):
+        for region_id in list(self.engines):
+            self.stop_region(region_id, wait=wait)
+
+    def _live_regions(self) -> list:
+        # the reader doesn't count against max_regions, it only translates when a page is turned
+        return [region_id for region_id in self.engines if region_id != self._reader_region]
+
+    def _start_region(self, coords, source, delay_seconds, counted=True):
+        self._prune_regions()
+        while counted and len(self._live_regions()) >= self._max_regions:
+            # oldest loop has to be idle before a new one starts competing for the models
+            self.stop_region(min(self._live_regions()), wait=True)
+        region_id = self._next_region_id
+        self._next_region_id += 1
+        engine = TranslationEngine(coords, delay_seconds, self, capture_source=source, region_id=region_id)
+        self.engines[region_id] = engine
+        self._display_region = region_id
+        engine.start()
+        if counted and self._max_regions > 1:
+            self.output_callback(f"Region {region_id} started, {len(self._live_regions())} of {self._max_regions} live regions running.")
+        return engine
+
+    def _models_unavailable(self) -> bool:
+        # a start before the models are usable, either still loading or loading failed for good
+        if self.MODELS_LOADED: return False
+        if self._load_error: self.output_callback(f"Live translation unavailable: {self._load_error}")
+        else: self.output_callback("Models are still loading, live translation can start once they are loaded.")
+        return True
 
     def start_continuous_translation(self):
-        self.stop_active_engine()
-        
+        if self._models_unavailable(): return
         snipper = SnippingTool(self.root_tk) 
         coords = snipper.start() 
         
         if coords:
-            self.active_engine = TranslationEngine(coords, DELAY_SECONDS, self)
-            self.active_engine.start()
+            source = ScreenCapture(coords)
+            if self._recording_dir:
+                out_dir = new_recording_dir(self._recording_dir)
+                source = RecordingSource(source, out_dir)
+                self.output_callback(f"Recording frames to {out_dir}")
+            self._start_region(coords, source, DELAY_SECONDS)
         else:
             self.output_callback("Selection cancelled.")
 
-    def _on_key_press(self, key):
-        k = key
-        if hasattr(key, 'char') and key.char:
-            k = keyboard.KeyCode.from_char(key.char.lower())
-        
-        self.current_keys.add(k)
-        
-        start_set = keys_to_pynput_set(self._start_combo_list)
-        stop_set = keys_to_pynput_set(self._stop_combo_list)
-        stop_set_v2 = keys_to_pynput_set(self._stop_v2_combo_list)
-
-        if stop_set_v2 and stop_set_v2.issubset(self.current_keys):
-            self.output_callback(f"Stopping translation")
-            self.stop_active_engine()
-            self.current_keys.clear()
-            return
-        
-        if start_set and start_set.issubset(self.current_keys):
-            self.hotkey_callback() 
-            self.current_keys.clear()
-            return
-            
-        if stop_set and stop_set.issubset(self.current_keys):
-            self.output_callback(f"Stopping translation")
-            self.stop_active_engine() 
-            self.current_keys.clear()
-            return
-
-    def _on_key_release(self, key):
-        k = key
-        if hasattr(key, 'char') and key.char:
-            k = keyboard.KeyCode.from_char(key.char.lower())
-        if k in self.current_keys:
-            self.current_keys.remove(k)
+    def start_capture_source(self, source, delay_seconds=DELAY_SECONDS):
+        """Runs live translation on any capture source, e.g. a replayed session."""
+        return self._start_region(None, source, delay_seconds)
+
+    def start_reader(self, path, lookahead=PREFETCH_PAGES, memory_budget_mb=PREFETCH_MEMORY_MB, cpu_share=PREFETCH_CPU_SHARE):
+        """Reader mode on a chapter folder or .cbz/.zip, turn_page() flips pages and the next ones are prefetched."""
+        reader = PageReader(path)
+        if not len(reader):
+            self.output_callback(f"No pages found in {path}")
+            return None
+        if self._reader_region is not None: self.stop_region(self._reader_region, wait=True)
+        engine = self._start_region(None, reader, 0, counted=False) # grab() waits for page turns itself
+        self.reader, self._reader_region = reader, engine.region_id
+        if lookahead > 0:
+            if not PAGE_STORE.enabled: self.output_callback("Page store is off, prefetched pages can't be kept.")
+            background = TranslationEngine(None, 0, self, frame_budget=0, capture_source=reader, region_id=PREFETCH_REGION, background=True)
+            self.backend.open(PREFETCH_REGION) # forgotten by the last reader's stop
+            self.prefetcher = PrefetchScheduler(background, reader, lookahead=lookahead, memory_budget_mb=memory_budget_mb, cpu_share=cpu_share)
+            self.prefetcher.start()
+        self.output_callback(f"Reading {os.path.basename(path.rstrip(os.sep))}: {len(reader)} pages, {lookahead} prefetched ahead. "
+                             "Right/Page Down/Space turns forward, Left/Page Up back.")
+        return engine
+
+    def turn_page(self, delta) -> bool:
+        return self.reader is not None and self.reader.turn(delta)
+
+    def _stop_prefetching(self):
+        if self.prefetcher is not None:
+            self.output_callback(self.prefetcher.report())
+            self.prefetcher.stop()
+            self.backend.forget(PREFETCH_REGION)
+        self.reader = self.prefetcher = self._reader_region = None
+
+    def region_report(self) -> str:
+        self._prune_regions()
+        if not self.engines: return "No live regions running."
+        busy = {region_id: self.backend.busy_seconds(region_id) for region_id in self.engines}
+        total = sum(busy.values())
+        lines = []
+        for region_id, engine in self.engines.items():
+            stages = self.backend.busy.get(region_id, {})
+            split = ", ".join(f"{stage} {seconds:.1f} s" for stage, seconds in stages.items()) or "no model time yet"
+            share = busy[region_id] / total if total else 0.0
+            shown = " (shown)" if region_id == self._display_region else ""
+            lines.append(f"Region {region_id}{shown}: {engine.fps():.2f} fps, {engine.frames_unchanged} unchanged frames skipped, "
+                         f"{share:.0%} of model time ({split})")
+        if len(self.engines) > 1 and total:
+            dominant = max(busy, key=busy.get)
+            lines.append(f"Region {dominant} dominates the shared backend, "
+                         f"{self.backend.batched_jobs} detections ran in {self.backend.batches} batched calls")
+        return "\n".join(lines)
+
+    def _on_start_hotkey(self):
+        if self._models_unavailable(): return
+        self.hotkey_callback() # the selection overlay is started from the UI thread
+
+    def _on_stop_hotkey(self):
+        self.output_callback("Stopping translation")
+        self.stop_all_regions()
 
 if __name__ == "__main__":
     manager = BubbleTranslatorManager()
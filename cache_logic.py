@@ -0,0 +1,212 @@
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 16 # 16x16 gradient bits = 256 bit hash
+OCR_MAX_DISTANCE = 8 # hamming distance still treated as the same crop
+OCR_CACHE_SIZE = 1024
+ASPECT_TOLERANCE = 0.1 # crops of a different shape never match, the hash is taken on a squashed crop
+DETECTION_CACHE_MB = 32
+FINGERPRINT_SIZE = 32 # frames are compared on a 33x32 thumbnail, 2 x 1024 gradient bits
+FINGERPRINT_MARGIN = 6 # summed RGB steps below this are flat, noise on white paper flips no bits
+FINGERPRINT_MAX_DISTANCE = 48 # differing bits still treated as the same frame, a different page is hundreds apart
+FINGERPRINT_PREFIX = 12 # frame size and crc32 of the pixels ahead of the hash bits
+CROP_HASH_SIZE = 16 # bubbles are compared on a 17x16 thumbnail, 2 x 256 gradient bits
+CROP_MARGIN = 18 # coarser than the frame's, screentone around a bubble sits right at small margins
+CROP_MAX_DISTANCE = 12 # capture noise and jpeg move a bubble's crop hash < 10 bits, different text in it 25+
+
+
+def dhash(img: Image.Image, hash_size=HASH_SIZE) -> int:
+    """Difference hash, one bit per horizontal brightness step of the grayscale crop scaled to a fixed size.
+
+    Scale and brightness changes don't move it, re-captures with a pixel of offset or some jpeg noise only flip a few bits.
+    """
+    small = np.asarray(img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class OcrCache:
+    """LRU of crop hash -> OCR text, near duplicate crops (hamming distance <= max_distance) count as hits."""
+    def __init__(self, max_entries=OCR_CACHE_SIZE, max_distance=OCR_MAX_DISTANCE, hash_size=HASH_SIZE):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self._entries = OrderedDict() # hash -> (aspect ratio, text)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0 # part of hits that needed the hamming search
+        self.misses = 0
+
+    def get(self, key, aspect):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.max_distance:
+                # linear scan, a thousand int xors is nothing next to an OCR pass
+                for other, candidate in self._entries.items():
+                    if (other ^ key).bit_count() <= self.max_distance and abs(candidate[0] - aspect) <= ASPECT_TOLERANCE * aspect:
+                        key, entry = other, candidate
+                        self.near_hits += 1
+                        break
+            if entry is None or abs(entry[0] - aspect) > ASPECT_TOLERANCE * aspect:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, aspect, text):
+        with self._lock:
+            self._entries[key] = (aspect, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def read(self, img: Image.Image, ocr_model) -> str:
+        """OCR text of img, ocr_model only runs when no close enough crop was read before."""
+        w, h = img.size
+        if not w or not h: return ocr_model(img)
+        key, aspect = dhash(img, self.hash_size), w / h
+        text = self.get(key, aspect)
+        if text is None:
+            text = ocr_model(img)
+            self.put(key, aspect, text)
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.near_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return dict(entries=len(self._entries), hits=self.hits, near_hits=self.near_hits, misses=self.misses,
+                    hit_rate=self.hits / lookups if lookups else 0.0)
+
+    def report(self) -> str:
+        s = self.stats()
+        return f"OCR cache: {s['hits']} hits ({s['near_hits']} near), {s['misses']} misses, {s['hit_rate']:.0%} hit rate, {s['entries']} entries"
+
+
+def _step_bits(img: np.ndarray, size: int, margin: int) -> np.ndarray:
+    # rising and falling brightness steps of a (size + 1) x size thumbnail, flat areas set neither
+    import cv2
+    thumb = cv2.resize(img, (size + 1, size), interpolation=cv2.INTER_AREA)
+    gray = thumb.sum(axis=2, dtype=np.int16) if thumb.ndim == 3 else thumb.astype(np.int16) * 3
+    steps = gray[:, 1:] - gray[:, :-1]
+    return np.concatenate(((steps > margin).ravel(), (steps < -margin).ravel()))
+
+def frame_fingerprint(frame: np.ndarray) -> bytes:
+    """Frame size, crc32 of the pixels and a dHash of the frame's thumbnail.
+
+    Equal fingerprints are the same pixels. Otherwise compare with fingerprint_distance(), capture noise, jpeg
+    re-encoding and brightness shifts flip a handful of bits, a different page hundreds. Changed text in a bubble
+    moves the thumbnail hash very little though, a near match has to pass crops_match() before anything is reused.
+    """
+    h, w = frame.shape[:2]
+    crc = zlib.crc32(np.ascontiguousarray(frame))
+    return struct.pack('>III', w, h, crc) + np.packbits(_step_bits(frame, FINGERPRINT_SIZE, FINGERPRINT_MARGIN)).tobytes()
+
+def fingerprint_bits(fingerprint: bytes) -> tuple:
+    # (size prefix, hash as int), what near lookups keep per entry so a scan is int xors only
+    return fingerprint[:8], int.from_bytes(fingerprint[FINGERPRINT_PREFIX:], 'big')
+
+def fingerprint_distance(a: bytes, b: bytes) -> int:
+    """Differing hash bits, frames of another size never match."""
+    if a[:8] != b[:8] or len(a) != len(b): return 8 * len(a)
+    return (fingerprint_bits(a)[1] ^ fingerprint_bits(b)[1]).bit_count()
+
+def same_frame(a: bytes, b: bytes, max_distance=FINGERPRINT_MAX_DISTANCE) -> bool:
+    return a is not None and b is not None and fingerprint_distance(a, b) <= max_distance
+
+def crop_hash(frame: np.ndarray, box) -> int:
+    """Hash of one bubble of frame, kept with its box so a near frame match can check the text in it is unchanged."""
+    x1, y1, x2, y2 = box
+    return int.from_bytes(np.packbits(_step_bits(frame[y1:y2, x1:x2], CROP_HASH_SIZE, CROP_MARGIN)).tobytes(), 'big')
+
+def crops_match(frame: np.ndarray, crops, max_distance=CROP_MAX_DISTANCE) -> bool:
+    """Whether every (box, crop hash) of a near matching frame still fits the same box of this one."""
+    return all(h is not None and (crop_hash(frame, box) ^ h).bit_count() <= max_distance for box, h in crops)
+
+def nearest_fingerprint(fingerprint: bytes, candidates: dict, max_distance=FINGERPRINT_MAX_DISTANCE):
+    """Closest key of candidates (fingerprint -> fingerprint_bits) within max_distance, None if there is none."""
+    if fingerprint in candidates: return fingerprint
+    size, bits = fingerprint_bits(fingerprint)
+    best, best_distance = None, max_distance + 1
+    for other, (other_size, other_bits) in candidates.items():
+        if other_size != size: continue
+        distance = (bits ^ other_bits).bit_count()
+        if distance < best_distance: best, best_distance = other, distance
+    return best
+
+
+class DetectionCache:
+    """LRU of frame fingerprint -> detected boxes with their RleMasks, bounded by memory instead of entry count.
+
+    A frame within FINGERPRINT_MAX_DISTANCE of a cached one counts as a hit if its bubbles pass crops_match().
+    """
+    def __init__(self, max_mb=DETECTION_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries = OrderedDict() # fingerprint -> ((box, mask, crop hash) list, nbytes)
+        self._bits = {} # fingerprint -> fingerprint_bits, for the near lookup
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, frame):
+        """List of (box, RleMask, crop hash) or None, masks are never modified in place so they are shared."""
+        with self._lock:
+            near = nearest_fingerprint(key, self._bits)
+            detections = self._entries[near][0] if near is not None else None
+            if detections is not None and near != key and not crops_match(frame, ((box, h) for box, _, h in detections)):
+                detections = None # close thumbnail, different text in the bubbles
+            if detections is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(near)
+            self.hits += 1
+            return list(detections)
+
+    def put(self, key, bubbles):
+        # run lengths only, a full page of bubbles is a few KB
+        detections = [(b.box, b.mask, b.crop_hash) for b in bubbles]
+        nbytes = 64 + sum(mask.nbytes + 128 for _, mask, _ in detections)
+        if nbytes > self.max_bytes: return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self.bytes -= old[1]
+            self._entries[key] = (detections, nbytes)
+            self._bits[key] = fingerprint_bits(key)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                evicted_key, (_, evicted) = self._entries.popitem(last=False)
+                self._bits.pop(evicted_key, None)
+                self.bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bits.clear()
+            self.bytes = 0
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return dict(entries=len(self._entries), mb=self.bytes / (1024 * 1024), hits=self.hits, misses=self.misses,
+                    hit_rate=self.hits / lookups if lookups else 0.0)
+
+    def report(self) -> str:
+        s = self.stats()
+        return (f"Detection cache: {s['hits']} hits, {s['misses']} misses, {s['hit_rate']:.0%} hit rate, "
+                f"{s['entries']} frames in {s['mb']:.2f} MB")
+
+
+OCR_CACHE = OcrCache()
+DETECTION_CACHE = DetectionCache()
+
+def cache_report() -> str:
+    return "\n".join((OCR_CACHE.report(), DETECTION_CACHE.report()))
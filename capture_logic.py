@@ -0,0 +1,291 @@
+import glob
+import io
+import json
+import os
+import queue
+import threading
+import time
+import zipfile
+from PIL import ImageGrab, Image
+
+RECORDING_INDEX = 'frames.jsonl'
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.webm')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+ARCHIVE_EXTENSIONS = ('.cbz', '.zip')
+TURN_WAIT_SECONDS = 0.2 # longest a reader grab() waits for a page turn
+
+
+class CaptureSource:
+    """Gives RGB PIL frames. grab() returns None once the source has nothing left."""
+    def grab(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ScreenCapture(CaptureSource):
+    def __init__(self, bbox=None):
+        # no bbox = whole screen
+        self.bbox = tuple(int(v) for v in bbox) if bbox else None
+        self._sct = None
+        self._use_mss = True
+
+    def grab(self):
+        # mss is a lot faster than ImageGrab on big regions, ImageGrab stays as fallback
+        if self._use_mss:
+            try:
+                if self._sct is None:
+                    import mss
+                    self._sct = mss.mss() # handles are per thread, so created by the grabbing thread
+                if self.bbox:
+                    x1, y1, x2, y2 = self.bbox
+                    region = {'left': x1, 'top': y1, 'width': x2 - x1, 'height': y2 - y1}
+                else:
+                    region = self._sct.monitors[0]
+                shot = self._sct.grab(region)
+                return Image.frombytes('RGB', shot.size, shot.bgra, 'raw', 'BGRX')
+            except Exception:
+                self._use_mss = False
+        return ImageGrab.grab(bbox=self.bbox)
+
+    def close(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+
+class _TimedFrames(CaptureSource):
+    """Frames with timestamps. speed 1.0 = real time (late frames are skipped like a live screen), 0 = as fast as possible."""
+    def __init__(self, speed=1.0, loop=False):
+        self.speed = speed
+        self.loop = loop
+        self.dropped = 0
+        self._start = None
+        self._index = 0
+
+    def _count(self) -> int: raise NotImplementedError
+    def _timestamp(self, i) -> float: raise NotImplementedError
+    def _load(self, i): raise NotImplementedError
+
+    def grab(self):
+        count = self._count()
+        if count == 0: return None
+        if self._index >= count:
+            if not self.loop: return None
+            self._index = 0
+            self._start = None
+
+        if self.speed <= 0:
+            frame = self._load(self._index)
+            self._index += 1
+            return frame
+
+        if self._start is None:
+            self._start = time.perf_counter() - self._timestamp(self._index) / self.speed
+        elapsed = (time.perf_counter() - self._start) * self.speed
+
+        # skip frames the consumer was too slow for, wait for the next one otherwise
+        while self._index + 1 < count and self._timestamp(self._index + 1) <= elapsed:
+            self._index += 1
+            self.dropped += 1
+        wait = (self._timestamp(self._index) - elapsed) / self.speed
+        if wait > 0: time.sleep(wait)
+
+        frame = self._load(self._index)
+        self._index += 1
+        return frame
+
+
+class ImageSequenceSource(_TimedFrames):
+    def __init__(self, paths, fps=0, loop=False):
+        # fps 0 plays every image back to back
+        super().__init__(speed=1.0 if fps else 0, loop=loop)
+        self.paths = list(paths)
+        self.fps = fps
+
+    @classmethod
+    def from_pattern(cls, pattern, **kwargs):
+        if os.path.isdir(pattern):
+            paths = [p for p in sorted(glob.glob(os.path.join(pattern, '*'))) if p.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            paths = sorted(glob.glob(pattern))
+        return cls(paths, **kwargs)
+
+    def _count(self): return len(self.paths)
+    def _timestamp(self, i): return i / self.fps if self.fps else 0.0
+    def _load(self, i): return Image.open(self.paths[i]).convert('RGB')
+
+
+class ReplaySource(_TimedFrames):
+    """Plays back a folder written by RecordingSource."""
+    def __init__(self, recording_dir, speed=1.0, loop=False):
+        super().__init__(speed=speed, loop=loop)
+        self.recording_dir = recording_dir
+        with open(os.path.join(recording_dir, RECORDING_INDEX), encoding='utf-8') as f:
+            self.entries = [json.loads(line) for line in f if line.strip()]
+
+    def _count(self): return len(self.entries)
+    def _timestamp(self, i): return self.entries[i]['t']
+    def _load(self, i): return Image.open(os.path.join(self.recording_dir, self.entries[i]['file'])).convert('RGB')
+
+
+class VideoFileSource(CaptureSource):
+    def __init__(self, path, speed=1.0, loop=False):
+        import cv2
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.dropped = 0
+        self._cap = cv2.VideoCapture(path)
+        self._fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._index = 0
+        self._start = None
+
+    def grab(self):
+        import cv2
+        if self.speed > 0:
+            if self._start is None: self._start = time.perf_counter()
+            due = int((time.perf_counter() - self._start) * self.speed * self._fps)
+            # grab() without retrieve() skips frames without decoding them
+            while self._index < due and self._cap.grab():
+                self._index += 1
+                self.dropped += 1
+            wait = (self._index / self._fps) / self.speed - (time.perf_counter() - self._start)
+            if wait > 0: time.sleep(wait)
+
+        ok, frame = self._cap.read()
+        if not ok:
+            if not self.loop or self._index == 0: return None
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._index = 0
+            self._start = None
+            return self.grab()
+        self._index += 1
+        return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def close(self):
+        self._cap.release()
+
+
+class PageReader(CaptureSource):
+    """A chapter folder or .cbz/.zip archive read page by page. grab() gives the page the user is on.
+
+    grab() waits a little for a page turn, so the engine picks up a turned page right away and an unturned one
+    is just skipped as an unchanged frame. Only the current page is kept decoded.
+    """
+    def __init__(self, path, turn_wait=TURN_WAIT_SECONDS):
+        self.path = path
+        self.turn_wait = turn_wait
+        self._archive = None
+        if path.lower().endswith(ARCHIVE_EXTENSIONS):
+            self._archive = zipfile.ZipFile(path)
+            self.pages = sorted(name for name in self._archive.namelist() if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            self.pages = [p for p in sorted(glob.glob(os.path.join(path, '*'))) if p.lower().endswith(IMAGE_EXTENSIONS)]
+        self._archive_lock = threading.Lock() # the reader engine and the prefetcher both read pages
+        self.index = 0
+        self._turned = threading.Event()
+        self._listeners = []
+        self._current = None # (index, image)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def load(self, index):
+        if self._archive is None:
+            return Image.open(self.pages[index]).convert('RGB')
+        with self._archive_lock:
+            data = self._archive.read(self.pages[index])
+        return Image.open(io.BytesIO(data)).convert('RGB')
+
+    def add_listener(self, callback):
+        # called with no arguments after every page turn
+        self._listeners.append(callback)
+
+    def turn(self, delta) -> bool:
+        index = max(0, min(len(self.pages) - 1, self.index + delta))
+        if index == self.index: return False
+        self.index = index
+        self._turned.set()
+        for callback in self._listeners: callback()
+        return True
+
+    def grab(self):
+        if not self.pages: return None
+        if self._current is not None: self._turned.wait(self.turn_wait) # the first page comes right away
+        self._turned.clear()
+        index = self.index
+        if self._current is None or self._current[0] != index:
+            self._current = (index, self.load(index))
+        return self._current[1]
+
+    def close(self):
+        self._turned.set() # a grab() still waiting returns right away
+        if self._archive is not None:
+            with self._archive_lock:
+                self._archive.close()
+
+
+class RecordingSource(CaptureSource):
+    """Passes frames through from another source and saves them with timestamps for ReplaySource."""
+    QUEUE_SIZE = 64
+
+    def __init__(self, source, out_dir):
+        self.source = source
+        self.out_dir = out_dir
+        self.dropped = 0
+        self.saved = 0
+        os.makedirs(out_dir, exist_ok=True)
+        self._start = None
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        # png encoding would slow the live loop, a writer thread does it
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def grab(self):
+        frame = self.source.grab()
+        if frame is None: return None
+        now = time.perf_counter()
+        if self._start is None: self._start = now
+        try:
+            self._queue.put_nowait((now - self._start, frame.copy()))
+        except queue.Full:
+            self.dropped += 1
+        return frame
+
+    def _write_loop(self):
+        with open(os.path.join(self.out_dir, RECORDING_INDEX), 'a', encoding='utf-8') as index:
+            while True:
+                item = self._queue.get()
+                if item is None: break
+                timestamp, frame = item
+                self.saved += 1
+                name = f"{self.saved:06d}.png"
+                frame.save(os.path.join(self.out_dir, name), compress_level=1)
+                index.write(json.dumps({'t': round(timestamp, 4), 'file': name}) + '\n')
+                index.flush()
+
+    def close(self):
+        self.source.close()
+        self._queue.put(None)
+        self._writer.join(5)
+
+
+def grab_region(bbox):
+    source = ScreenCapture(bbox)
+    try:
+        return source.grab()
+    finally:
+        source.close()
+
+def new_recording_dir(base_dir) -> str:
+    return os.path.join(base_dir, time.strftime('session-%Y%m%d-%H%M%S'))
+
+def open_capture_source(path, speed=1.0, loop=False) -> CaptureSource:
+    """Recording folder, video file, image folder or glob pattern."""
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, RECORDING_INDEX)):
+        return ReplaySource(path, speed=speed, loop=loop)
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        return VideoFileSource(path, speed=speed, loop=loop)
+    return ImageSequenceSource.from_pattern(path, loop=loop)
@@ -0,0 +1,115 @@
+import queue
+import threading
+from itertools import combinations
+
+# settings names -> key tokens, left/right variants of a modifier are the same token
+KEY_ALIASES = {'CONTROL': 'ctrl', 'CTRL': 'ctrl', 'SHIFT': 'shift', 'ALT': 'alt', 'ESCAPE': 'esc', 'ESC': 'esc'}
+SIDE_SUFFIXES = ('_l', '_r')
+
+
+def key_token(key):
+    """pynput Key/KeyCode -> the token combos are compiled to, None for keys no combo can use."""
+    name = getattr(key, 'name', None) # pynput.keyboard.Key members
+    if name:
+        for suffix in SIDE_SUFFIXES:
+            if name.endswith(suffix): return name[:-len(suffix)]
+        return name
+    char = getattr(key, 'char', None)
+    if char and char.isprintable(): return char.lower()
+    vk = getattr(key, 'vk', None)
+    # with Control held some platforms report a control character, the virtual key code still says which letter
+    if vk is not None and (0x41 <= vk <= 0x5A or 0x30 <= vk <= 0x39): return chr(vk).lower()
+    return None
+
+def compile_combination(key_strings: list[str]) -> frozenset:
+    """["Shift", "E"] -> frozenset({'shift', 'e'}), done once when a combo is set, not per keystroke."""
+    tokens = set()
+    for key_str in key_strings:
+        upper = key_str.upper()
+        tokens.add(KEY_ALIASES.get(upper, key_str.lower()))
+    return frozenset(tokens)
+
+
+class HotkeyService:
+    """The one global keyboard hook of the app.
+
+    Combos are compiled to frozensets on register(), a keystroke is a set update and dict lookups of the pressed keys'
+    subsets that hold the new key, at most as long as the longest combo. Matches are queued and their callbacks run on a dispatch thread, so the OS hook never waits
+    on our work.
+    """
+    def __init__(self):
+        self._bindings = {} # name -> (combo, callback)
+        self._table = {} # combo -> name
+        self._longest = 0 # keys in the longest combo, no bigger subset of the pressed keys is looked up
+        self._pressed = set()
+        self._latched = None # combo that fired and is still held, key repeat doesn't fire it again
+        self._lock = threading.Lock() # register() comes from the UI thread, lookups from the hook thread
+        self._queue = queue.SimpleQueue()
+        self._listener = None
+        self._dispatcher = None
+
+    def register(self, name: str, key_strings: list[str], callback):
+        combo = compile_combination(key_strings)
+        with self._lock:
+            self._bindings[name] = (combo, callback)
+            self._rebuild()
+
+    def unregister(self, name: str):
+        with self._lock:
+            if self._bindings.pop(name, None): self._rebuild()
+
+    def _rebuild(self):
+        # later registrations win a combo two bindings share
+        self._table = {combo: name for name, (combo, _) in self._bindings.items() if combo}
+        self._longest = max(map(len, self._table), default=0)
+
+    def start(self):
+        if self._listener is not None: return
+        from pynput import keyboard # needs a display, imported only once hotkeys are used
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+        self._listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is None: return
+        self._listener.stop()
+        self._listener = None
+        self._queue.put(None)
+        self._dispatcher = None
+
+    def _on_press(self, key):
+        token = key_token(key)
+        if token is None: return
+        self._pressed.add(token)
+        # subset match, a key whose release we missed (focus changes, the tk overlay) must not block any combo
+        # the combo has to contain the key just pressed, biggest subsets first so the one with most keys wins
+        table, others = self._table, self._pressed - {token}
+        for size in range(min(len(others), self._longest - 1), -1, -1):
+            for rest in combinations(others, size):
+                combo = frozenset(rest).union((token,))
+                name = table.get(combo)
+                if name is None: continue
+                if combo == self._latched: return
+                self._latched = combo
+                self._queue.put(name)
+                return
+
+    def _on_release(self, key):
+        token = key_token(key)
+        self._pressed.discard(token)
+        if self._latched is not None and token in self._latched: self._latched = None
+
+    def _dispatch_loop(self):
+        while True:
+            name = self._queue.get()
+            if name is None: return
+            binding = self._bindings.get(name)
+            if binding is None: continue
+            try:
+                binding[1]()
+            except Exception as e:
+                print(f"Hotkey '{name}' failed: {e}")
+
+
+HOTKEYS = HotkeyService()
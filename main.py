@@ -1,6 +1,10 @@
 import sys
 import os
 import platform
+from profiling_logic import STARTUP_PROFILER, MEMORY_PROFILER, MEMORY_TOP, MEMORY_DUMP_KEYS, mark_process_start
+mark_process_start()
+if '--profile-startup' in sys.argv:
+    STARTUP_PROFILER.install_import_timer()
 # making sure main.py opens the app
 def restart_in_venv():
     VENV_FOLDER_NAME = "venv" 
@@ -25,16 +29,23 @@ restart_in_venv()
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
     QPushButton, QLabel, QStatusBar, QSizePolicy, QStackedWidget, QSplitter,
-    QLineEdit, QGridLayout, QFrame, QTextEdit, QCheckBox ) 
-from PySide6.QtCore import Qt, QObject, Signal, QByteArray, QBuffer, QIODevice, QSize
-from PySide6.QtGui import QPixmap
-from ultralytics import YOLO
-from manga_ocr import MangaOcr
-from transformers import MarianMTModel, MarianTokenizer
-import torch
+    QLineEdit, QGridLayout, QFrame, QPlainTextEdit, QCheckBox, QComboBox ) 
+from PySide6.QtCore import Qt, QObject, Signal, QByteArray, QBuffer, QIODevice, QSize, QTimer
+from PySide6.QtGui import QPixmap, QPainter, QTextCursor, QShortcut, QKeySequence
+import argparse
+import threading
 import time
-from bubble_logic import BubbleTranslatorManager 
+from collections import deque
+from bubble_logic import BubbleTranslatorManager, MAX_REGIONS
 from snipper_logic import get_snipping_manager 
+from model_logic import load_models, compile_snapshot, ModelRegistry, SNAPSHOT_PATH
+from threads_logic import THREAD_BUDGET, THREAD_POLICIES, parse_thread_split
+from capture_logic import open_capture_source
+from translation_logic import get_profile_names, PROFILE_STATS, TARGET_LANGUAGES, DEFAULT_TARGET_LANGUAGE
+from cache_logic import cache_report
+from store_logic import PAGE_STORE, PAGE_STORE_PATH
+from hotkey_logic import HOTKEYS
+from prefetch_logic import PREFETCH_PAGES, PREFETCH_MEMORY_MB, PREFETCH_CPU_SHARE
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -42,6 +53,9 @@ class TranslationSignals(QObject):
     #signals for files
     new_output = Signal(str)
     new_image_data = Signal(bytes)
+    new_image_patch = Signal(int, int, bytes)
+    new_frame_result = Signal(object)
+    models_loaded = Signal(object)
     hotkey_triggered = Signal() 
     
 KEY_MAP = {
@@ -72,34 +86,69 @@ KEY_MAP = {
 }
 MODIFIERS = ["Control", "Shift", "Alt"]
 MODELS_AVAILABLE = True
+CONSOLE_MAX_LINES = 2000
+CONSOLE_FLUSH_MS = 16 # one frame at 60 Hz, everything logged within it lands in one insert
 
-def load_models(): 
-    models ={} 
-    try:
-        DEVICE='cuda' if torch.cuda.is_available() else 'cpu'
-        CUSTOM_FONT_PATH = './fonts/PermanentMarker-Regular.ttf'
-        TRANSLATION_MODEL_NAME = 'Helsinki-NLP/opus-mt-ja-en'
-        TRANSLATION_MODEL_PATH = './models'
-        BUBBLE_PATH = './models/bubble_model.pt'
-
-        os.environ['TRANSFORMERS_CACHE'] = TRANSLATION_MODEL_PATH
-        os.environ['HF_HOME'] = TRANSLATION_MODEL_PATH
-        models['ocr'] = MangaOcr()
-        models['bubble'] = YOLO(BUBBLE_PATH)
-        models['tokenizer'] = MarianTokenizer.from_pretrained(TRANSLATION_MODEL_NAME, cache_dir=TRANSLATION_MODEL_PATH)
-        models['translator'] = MarianMTModel.from_pretrained(TRANSLATION_MODEL_NAME, cache_dir=TRANSLATION_MODEL_PATH).to(DEVICE)
-        models['device'] = DEVICE
-        return models
-    except Exception as e:
-        print(f'Models not loaded {e}')
-        return {}
-    
 def format_combination_for_display(keys_list: list) -> str:
     return ' + '.join(keys_list)
 
+def dump_memory_snapshot() -> str:
+    # settings button and hotkey, a short report for the console, the full snapshot goes to ./logs/memory
+    try:
+        path = MEMORY_PROFILER.dump()
+    except OSError as e:
+        return f"Memory snapshot failed: {e}"
+    return f"{MEMORY_PROFILER.report()}\nSnapshot written to {path}"
+
+class ConsoleLog(QPlainTextEdit):
+    """Read only console, newest entry on top, capped at max_lines lines.
+
+    Entries wait in a bounded deque and are inserted together once per flush interval, the oldest lines are cut off
+    the bottom, so a line costs the same no matter how long the session ran.
+    """
+    def __init__(self, header: str, max_lines=CONSOLE_MAX_LINES, flush_ms=CONSOLE_FLUSH_MS):
+        super().__init__()
+        self.setReadOnly(True)
+        self.setPlainText(header)
+        self.max_lines = max(1, max_lines)
+        self.line_count = 1 # kept by flush(), read by the memory profiler from other threads
+        self._pending = deque(maxlen=self.max_lines) # a burst longer than the cap would be cut anyway
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def append_entry(self, text: str):
+        self._pending.append(f"[{time.strftime('%H:%M:%S')}] \n{text.strip()}")
+        if not self._flush_timer.isActive(): self._flush_timer.start()
+
+    def flush(self):
+        if not self._pending: return
+        batch = "\n\n".join(reversed(self._pending)) + "\n\n"
+        self._pending.clear()
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.Start)
+        cursor.insertText(batch)
+        self._trim()
+        self.line_count = self.document().blockCount()
+
+    def _trim(self):
+        # cut from the bottom, setMaximumBlockCount would drop the newest lines since they are on top
+        document = self.document()
+        extra = document.blockCount() - self.max_lines
+        if extra <= 0: return
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        # start of the first block to go, extra blocks in all counting the last one
+        cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
+        if extra > 1: cursor.movePosition(QTextCursor.PreviousBlock, QTextCursor.KeepAnchor, extra - 1)
+        cursor.movePosition(QTextCursor.PreviousCharacter, QTextCursor.KeepAnchor) # the line break before the cut too
+        cursor.removeSelectedText()
+
+
 class MainView(QWidget):
     #main window
-    def __init__(self, signals, translator_manager):
+    def __init__(self, signals, translator_manager, console_lines=CONSOLE_MAX_LINES):
         super().__init__()
         self.setObjectName("MainView")
         self.signals = signals
@@ -120,15 +169,16 @@ class MainView(QWidget):
         self.image_label.setMinimumSize(1, 1) 
         self.image_label.setFrameShape(QFrame.StyledPanel)
         self.image_label.setWordWrap(True)
+        self._frame_pixmap = None # full resolution frame, patches are painted onto it
+        self.last_frame_result = None
 
-        self.console_widget = QTextEdit()
-        self.console_widget.setReadOnly(True)
-        self.console_widget.setText(
+        self.console_widget = ConsoleLog(
             "Console Output Here...\n\n"
             "Controls:\n"
             "- Press Shift + E to select an area and start continuous translation.\n"
             "- Press Shift + S or ESC to stop the continuous translation loop.\n"
-            "- Press Shift + Q to select area and get single translation. \n"
+            "- Press Shift + Q to select area and get single translation. \n",
+            max_lines=console_lines
         )
         self.console_widget.setObjectName("ConsoleWidget")
         self.console_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -143,18 +193,20 @@ class MainView(QWidget):
 
         self.signals.new_output.connect(self.append_console_output)
         self.signals.new_image_data.connect(self.display_translated_image)
+        self.signals.new_image_patch.connect(self.apply_image_patch)
+        self.signals.new_frame_result.connect(self.display_frame_result)
         self.signals.hotkey_triggered.connect(self.translator_manager.start_continuous_translation)
         
         self.translator_manager.set_gui_callbacks(
             output_callback=self.signals.new_output.emit,
             image_callback=self.signals.new_image_data.emit,
-            hotkey_callback=self.signals.hotkey_triggered.emit 
+            hotkey_callback=self.signals.hotkey_triggered.emit,
+            patch_callback=self.signals.new_image_patch.emit,
+            result_callback=self.signals.new_frame_result.emit
         )
 
     def append_console_output(self, text):
-        current_text = self.console_widget.toPlainText()
-        new_text = f"[{time.strftime('%H:%M:%S')}] "+"\n" + text + "\n\n" + current_text
-        self.console_widget.setText(new_text.strip())
+        self.console_widget.append_entry(text)
 
     def display_translated_image(self, image_data: bytes):
         pixmap = QPixmap()
@@ -163,34 +215,60 @@ class MainView(QWidget):
         buffer.open(QIODevice.ReadOnly)
         
         if pixmap.loadFromData(buffer.data()):
-            label_size = self.image_label.size()
-            should_scale = (
-                pixmap.width() > label_size.width() or 
-                pixmap.height() > label_size.height()
-            )
-            
-            if should_scale:
-                final_pixmap = pixmap.scaled(
-                    label_size, 
-                    Qt.KeepAspectRatio, 
-                    Qt.SmoothTransformation 
-                )
-            else:
-                final_pixmap = pixmap
-
-            self.image_label.setPixmap(final_pixmap) 
-            self.image_label.setAlignment(Qt.AlignCenter)
+            self._frame_pixmap = pixmap
+            self._show_frame()
         else:
             self.image_label.setText("Error displaying image.")
             self.append_console_output("ERROR: Failed to load image data into QPixmap.")
 
+    def apply_image_patch(self, x: int, y: int, image_data: bytes):
+        # only the changed bubble region is sent, paint it over the last full frame
+        if self._frame_pixmap is None: return
+        patch = QPixmap()
+        if not patch.loadFromData(image_data): return
+
+        painter = QPainter(self._frame_pixmap)
+        painter.drawPixmap(x, y, patch)
+        painter.end()
+        self._show_frame()
+
+    def display_frame_result(self, result):
+        self.last_frame_result = result
+        if self.translator_manager.get_render_images(): return
+
+        # text only mode, no image was encoded so show the translations as plain selectable text
+        self._frame_pixmap = None
+        self.image_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.image_label.setText(result.to_text() or "No bubbles found.")
+
+    def _show_frame(self):
+        pixmap = self._frame_pixmap
+        label_size = self.image_label.size()
+        should_scale = (
+            pixmap.width() > label_size.width() or 
+            pixmap.height() > label_size.height()
+        )
+        
+        if should_scale:
+            final_pixmap = pixmap.scaled(
+                label_size, 
+                Qt.KeepAspectRatio, 
+                Qt.SmoothTransformation 
+            )
+        else:
+            final_pixmap = pixmap
+
+        self.image_label.setPixmap(final_pixmap) 
+        self.image_label.setAlignment(Qt.AlignCenter)
+
 class SettingsView(QWidget):
     #inference
-    def __init__(self, snipper_manager, bubble_translator_manager):
+    def __init__(self, snipper_manager, bubble_translator_manager, target_language=DEFAULT_TARGET_LANGUAGE):
         super().__init__()
         self.setObjectName("SettingsView")
         self.snipper_manager = snipper_manager
         self.bubble_manager = bubble_translator_manager
+        self._target_language = target_language # kept here too, the combo works before the models finished loading
 
         settings_layout = QVBoxLayout(self)
         settings_layout.setContentsMargins(15, 15, 15, 15)
@@ -274,7 +352,52 @@ class SettingsView(QWidget):
         self.image_check.stateChanged.connect(self.snipper_manager.set_display_image_from_qt)
         output_group.layout().addWidget(self.image_check)
 
+        self.progressive_check = QCheckBox("Progressive Rendering In Live Mode (show covered bubbles first)")
+        initial_progressive_state = Qt.Checked if self.bubble_manager.get_progressive_rendering() else Qt.Unchecked
+        self.progressive_check.setCheckState(initial_progressive_state)
+        self.progressive_check.stateChanged.connect(self.bubble_manager.set_progressive_rendering_from_qt)
+        output_group.layout().addWidget(self.progressive_check)
+
+        self.revalidate_check = QCheckBox("Re-check Pages Shown From The Page Store In The Background")
+        initial_revalidate_state = Qt.Checked if self.bubble_manager.get_revalidate_pages() else Qt.Unchecked
+        self.revalidate_check.setCheckState(initial_revalidate_state)
+        self.revalidate_check.stateChanged.connect(self.bubble_manager.set_revalidate_pages_from_qt)
+        output_group.layout().addWidget(self.revalidate_check)
+
+        self.render_check = QCheckBox("Render Translated Image In Live Mode (off = translations as text only)")
+        initial_render_state = Qt.Checked if self.bubble_manager.get_render_images() else Qt.Unchecked
+        self.render_check.setCheckState(initial_render_state)
+        self.render_check.stateChanged.connect(self.bubble_manager.set_render_images_from_qt)
+        output_group.layout().addWidget(self.render_check)
+
         settings_box_layout.addWidget(output_group)
+        settings_box_layout.addSpacing(30)
+
+        settings_box_layout.addWidget(QLabel("<h3>Translation Decoding Profiles:</h3>"))
+        settings_box_layout.addSpacing(5)
+        self.setup_profile_group(settings_box_layout, "Live Translation:", self.bubble_manager.get_decoding_profile, self.bubble_manager.set_decoding_profile)
+        self.setup_profile_group(settings_box_layout, "Snipping Tool:", self.snipper_manager.get_decoding_profile, self.snipper_manager.set_decoding_profile)
+        self.setup_language_group(settings_box_layout)
+
+        latency_btn = QPushButton("Print Profile Latency To Console")
+        latency_btn.clicked.connect(lambda: self.snipper_manager.log_message(PROFILE_STATS.report()))
+        settings_box_layout.addWidget(latency_btn)
+
+        cache_btn = QPushButton("Print Cache Stats To Console")
+        cache_btn.clicked.connect(lambda: self.snipper_manager.log_message(cache_report() + "\n" + PAGE_STORE.report()))
+        settings_box_layout.addWidget(cache_btn)
+
+        regions_btn = QPushButton("Print Live Region Stats To Console")
+        regions_btn.clicked.connect(lambda: self.snipper_manager.log_message(self.bubble_manager.region_report()))
+        settings_box_layout.addWidget(regions_btn)
+
+        models_btn = QPushButton("Print Model Status To Console")
+        models_btn.clicked.connect(self.print_model_status)
+        settings_box_layout.addWidget(models_btn)
+
+        memory_btn = QPushButton("Dump Memory Snapshot")
+        memory_btn.clicked.connect(lambda: self.snipper_manager.log_message(dump_memory_snapshot()))
+        settings_box_layout.addWidget(memory_btn)
         settings_box_layout.addStretch()
 
         settings_layout.addWidget(self.settings_box_content)
@@ -316,6 +439,48 @@ class SettingsView(QWidget):
         shortcut_layout.addWidget(change_btn, 0, 2)
         layout.addWidget(shortcut_group)
 
+    def print_model_status(self):
+        models = self.bubble_manager.MODELS
+        self.snipper_manager.log_message(models.report() if isinstance(models, ModelRegistry) else "Models not loaded")
+
+    def setup_profile_group(self, layout, label_text, get_profile_func, set_profile_func):
+        # fast = greedy, balanced = 2 beams, quality = 5 beams
+        profile_group = QWidget()
+        profile_layout = QGridLayout(profile_group)
+        profile_layout.setColumnStretch(1, 1)
+
+        profile_box = QComboBox()
+        profile_box.addItems(get_profile_names())
+        profile_box.setCurrentText(get_profile_func())
+        profile_box.currentTextChanged.connect(set_profile_func)
+
+        profile_layout.addWidget(QLabel(label_text), 0, 0, Qt.AlignLeft)
+        profile_layout.addWidget(profile_box, 0, 1)
+        layout.addWidget(profile_group)
+
+    def get_target_language(self): return self._target_language
+
+    def setup_language_group(self, layout):
+        # shared by live mode and snipping, a new language loads its model on the next translation
+        language_group = QWidget()
+        language_layout = QGridLayout(language_group)
+        language_layout.setColumnStretch(1, 1)
+
+        language_box = QComboBox()
+        for code, name in TARGET_LANGUAGES.items():
+            language_box.addItem(name, code)
+        language_box.setCurrentIndex(max(0, language_box.findData(self._target_language)))
+        def on_language_changed(index):
+            self._target_language = language_box.itemData(index)
+            models = self.bubble_manager.MODELS
+            if 'translators' in models: models['translators'].set_target_language(self._target_language)
+            self.snipper_manager.log_message(f"Target language: {language_box.itemText(index)}")
+        language_box.currentIndexChanged.connect(on_language_changed)
+
+        language_layout.addWidget(QLabel("Target Language:"), 0, 0, Qt.AlignLeft)
+        language_layout.addWidget(language_box, 0, 1)
+        layout.addWidget(language_group)
+
     def start_shortcut_capture(self, display_widget, setter_func, getter_func):
         if self.is_capturing: return
         self.is_capturing = True
@@ -434,17 +599,20 @@ class SettingsView(QWidget):
 
 class ModernWindow(QMainWindow):
     #Main window integrating all views and managers
-    def __init__(self):
+    def __init__(self, options=None):
         super().__init__()
+        self.options = options if options is not None else parse_args([])
         self.setWindowTitle("Manga Translator")
         self.resize(800, 600) 
 
         self.signals = TranslationSignals()
-        self.snipper_manager = get_snipping_manager()
-        self.bubble_translator_manager = BubbleTranslatorManager()
-        load_models_dict = load_models()
-        self.bubble_translator_manager.set_models(load_models_dict)
-        self.snipper_manager.set_models(load_models_dict)
+        with STARTUP_PROFILER.phase('get_snipping_manager'):
+            self.snipper_manager = get_snipping_manager()
+        with STARTUP_PROFILER.phase('BubbleTranslatorManager'):
+            self.bubble_translator_manager = BubbleTranslatorManager()
+        # models load on a worker thread once the window is up, see _start_model_loading
+        self.models = {}
+        self.signals.models_loaded.connect(self._on_models_loaded)
         self.snipper_manager.set_gui_output_callback(self.signals.new_output.emit)
         self.setStyleSheet(self.get_stylesheet())
 
@@ -461,8 +629,8 @@ class ModernWindow(QMainWindow):
         self.view_stack.setObjectName("ViewStack")
         main_layout.addWidget(self.view_stack, 1)
 
-        self.main_view = MainView(self.signals, self.bubble_translator_manager) 
-        self.settings_view = SettingsView(self.snipper_manager,self.bubble_translator_manager)
+        self.main_view = MainView(self.signals, self.bubble_translator_manager, console_lines=self.options.console_lines) 
+        self.settings_view = SettingsView(self.snipper_manager,self.bubble_translator_manager, target_language=self.options.target_language)
 
         self.view_stack.addWidget(self.main_view)   
         self.view_stack.addWidget(self.settings_view)
@@ -478,12 +646,91 @@ class ModernWindow(QMainWindow):
         self.bubble_translator_manager.start_hotkey_listener()
         QApplication.instance().aboutToQuit.connect(self._cleanup)
 
+        if self.options.record:
+            self.bubble_translator_manager.set_recording_dir(self.options.record)
+        self.bubble_translator_manager.set_max_regions(self.options.regions)
+        self.bubble_translator_manager.set_revalidate_pages(not self.options.no_revalidate)
+        if self.options.memory_profile:
+            MEMORY_PROFILER.enable(self.options.memory_profile, top=self.options.memory_top)
+            MEMORY_PROFILER.add_gauge('console_lines', lambda: self.main_view.console_widget.line_count)
+            MEMORY_PROFILER.add_gauge('live_regions', lambda: len(self.bubble_translator_manager.engines))
+            HOTKEYS.register('memory_dump', MEMORY_DUMP_KEYS, lambda: self.signals.new_output.emit(dump_memory_snapshot()))
+            self.signals.new_output.emit(f"Memory profiling every {self.options.memory_profile} frames, "
+                                         f"{format_combination_for_display(MEMORY_DUMP_KEYS)} dumps a snapshot")
+        if not self.options.no_page_store:
+            try:
+                PAGE_STORE.open(self.options.page_store)
+            except Exception as e:
+                self.signals.new_output.emit(f"Page store unavailable: {e}")
+        QTimer.singleShot(0, self._start_model_loading)
+
+    def _start_model_loading(self):
+        # first turn of the event loop, the window is on screen by now
+        STARTUP_PROFILER.mark('time_to_window')
+        self.signals.new_output.emit("Loading models...")
+        threading.Thread(target=self._load_models, daemon=True).start()
+
+    def _load_models(self):
+        THREAD_BUDGET.configure(total=self.options.threads, policy=self.options.thread_policy,
+                                split=parse_thread_split(self.options.thread_split) if self.options.thread_split else None)
+        with STARTUP_PROFILER.phase('load_models'):
+            models = load_models(quantize=self.options.quantize, idle_timeout=self.options.model_idle_timeout * 60,
+                                 memory_budget_mb=self.options.memory_budget, target_language=self.options.target_language,
+                                 snapshot_dir=None if self.options.no_snapshot else SNAPSHOT_PATH)
+        self.signals.models_loaded.emit(models)
+
+    def _on_models_loaded(self, models):
+        if isinstance(models, ModelRegistry):
+            models.on_event = self.signals.new_output.emit # reloads/unloads show up in the console
+            models['translators'].on_event = self.signals.new_output.emit
+            models['translators'].set_target_language(self.settings_view.get_target_language()) # may have changed while loading
+        self.models = models
+        self.bubble_translator_manager.set_models(models)
+        self.snipper_manager.set_models(models)
+        # hotkeys and snips say this from now on instead of waiting for models that won't come
+        error = "translation models failed to load, check ./models and the console output of the start."
+        if not self.bubble_translator_manager.MODELS_LOADED: self.bubble_translator_manager.set_load_error(error)
+        if not models: self.snipper_manager.set_load_error(error) # snips still work without a translator, text only
+        self.signals.new_output.emit("Models loaded." if models else "ERROR: Translation models failed to load.")
+
+        STARTUP_PROFILER.mark('time_to_models')
+        if self.options.profile_startup:
+            STARTUP_PROFILER.write_metrics(models_loaded=bool(models))
+            STARTUP_PROFILER.remove_import_timer()
+            print(STARTUP_PROFILER.report())
+
+        if models and self.options.replay:
+            source = open_capture_source(self.options.replay, speed=self.options.replay_speed)
+            # the source paces itself, no extra delay between frames
+            self.bubble_translator_manager.start_capture_source(source, delay_seconds=0)
+        elif models and self.options.read:
+            if self.bubble_translator_manager.start_reader(self.options.read, lookahead=self.options.prefetch,
+                                                           memory_budget_mb=self.options.prefetch_memory, cpu_share=self.options.prefetch_cpu):
+                self._add_reader_shortcuts()
+
+    def _add_reader_shortcuts(self):
+        # window wide, a focused button or combo box would otherwise take the arrow keys and Space first
+        self._reader_shortcuts = []
+        for keys, delta in (((Qt.Key.Key_Right, Qt.Key.Key_PageDown, Qt.Key.Key_Space), 1), ((Qt.Key.Key_Left, Qt.Key.Key_PageUp), -1)):
+            for key in keys:
+                shortcut = QShortcut(QKeySequence(key), self)
+                shortcut.setContext(Qt.WindowShortcut)
+                shortcut.activated.connect(lambda delta=delta: self._turn_page(delta))
+                self._reader_shortcuts.append(shortcut)
+
+    def _turn_page(self, delta):
+        if self.bubble_translator_manager.turn_page(delta) or self.bubble_translator_manager.reader is not None: return
+        # reader mode ended, the keys go back to the widgets
+        for shortcut in self._reader_shortcuts:
+            shortcut.setEnabled(False)
+
     def _cleanup(self):
         """Stops background listeners on exit."""
         if self.snipper_manager:
             self.snipper_manager.stop_listeners()
         if self.bubble_translator_manager:
             self.bubble_translator_manager.stop_listeners()
+        PAGE_STORE.close()
 
     def create_sidebar(self):
         sidebar = QWidget()
@@ -596,6 +843,13 @@ class ModernWindow(QMainWindow):
             padding: 5px 10px;
             color: white;
         }}
+        QComboBox {{
+            background-color: #252525;
+            border: 1px solid #555555;
+            border-radius: 5px;
+            padding: 5px 10px;
+            color: white;
+        }}
         QLineEdit#ShortcutDisplay[readOnly="true"] {{
             color: {ACCENT_COLOR};
             font-weight: bold;
@@ -625,8 +879,46 @@ class ModernWindow(QMainWindow):
         QSplitter::handle:hover {{ background: {ACCENT_COLOR}; }}
         """
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Manga Translator")
+    parser.add_argument('--quantize', action='store_true', help="Use dynamic int8 translator on CPU (cached in ./models/quantized)")
+    parser.add_argument('--record', metavar='DIR', help="Save live mode frames with timestamps under DIR for replaying")
+    parser.add_argument('--replay', metavar='PATH', help="Run live mode on a recording folder, video file or image folder instead of the screen")
+    parser.add_argument('--replay-speed', type=float, default=1.0, help="1 = recorded speed, 0 = as fast as possible")
+    parser.add_argument('--read', metavar='PATH', help="Reader mode on a chapter folder or .cbz/.zip, arrow keys turn pages")
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_PAGES, help="Pages translated ahead of the one being read in reader mode (0 = off)")
+    parser.add_argument('--prefetch-memory', type=int, default=PREFETCH_MEMORY_MB, help="No prefetching while the app uses more than this many MB (0 = no limit)")
+    parser.add_argument('--prefetch-cpu', type=float, default=PREFETCH_CPU_SHARE, help="Most of the time prefetching may keep the models busy, 0.05 to 1")
+    parser.add_argument('--page-store', default=PAGE_STORE_PATH, help="SQLite file of translated pages, known pages are shown without running any model")
+    parser.add_argument('--no-page-store', action='store_true', help="Don't look up or save translated pages")
+    parser.add_argument('--no-revalidate', action='store_true', help="Trust stored pages, don't re-read them in the background")
+    parser.add_argument('--regions', type=int, default=MAX_REGIONS, help="Live regions that may run at once, e.g. 2 for two monitors")
+    parser.add_argument('--console-lines', type=int, default=CONSOLE_MAX_LINES, help="Lines kept in the console, older ones are dropped")
+    parser.add_argument('--memory-profile', type=int, default=0, metavar='N', help="Sample RSS, tracemalloc and object counts every N live frames to ./logs/memory.jsonl (0 = off)")
+    parser.add_argument('--memory-top', type=int, default=MEMORY_TOP, help="Allocation sites kept per memory sample")
+    parser.add_argument('--profile-startup', action='store_true', help="Print import times and init phases once the models are loaded, and log the start to ./logs/startup.jsonl")
+    parser.add_argument('--compile-snapshot', action='store_true', help=f"Export the models to {SNAPSHOT_PATH} for fast memory mapped starts and exit")
+    parser.add_argument('--no-snapshot', action='store_true', help="Load the original checkpoints even if a snapshot exists")
+    parser.add_argument('--target-language', choices=list(TARGET_LANGUAGES), default=DEFAULT_TARGET_LANGUAGE, help="Language to translate into, can be changed in Settings")
+    parser.add_argument('--model-idle-timeout', type=float, default=0, help="Unload models unused for this many minutes, reloaded on next use (0 = keep loaded)")
+    parser.add_argument('--memory-budget', type=int, default=0, help="Unload least recently used models while the app uses more than this many MB (0 = no limit)")
+    parser.add_argument('--threads', type=int, default=0, help="CPU threads for all models together (0 = every available core)")
+    parser.add_argument('--thread-policy', choices=list(THREAD_POLICIES), default='balanced', help="How the thread budget is shared between detection, OCR and translation")
+    parser.add_argument('--thread-split', help="Explicit threads per stage, e.g. detect=4,ocr=2,mt=2 (see benchmark.py threads)")
+    # Qt consumes its own flags, leave unknown ones alone
+    options, _ = parser.parse_known_args(argv)
+    return options
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = ModernWindow()
+    options = parse_args()
+    if options.compile_snapshot:
+        for name, seconds in compile_snapshot([options.target_language]).items():
+            print(f"{name}: exported in {seconds:.1f} s")
+        sys.exit(0)
+    STARTUP_PROFILER.mark('imports_done')
+    with STARTUP_PROFILER.phase('QApplication'):
+        app = QApplication(sys.argv)
+    with STARTUP_PROFILER.phase('ModernWindow'):
+        window = ModernWindow(options)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class RleMask:
+    """Box local binary mask as row major run lengths, alternating off/on and starting with off.
+
+    A bubble mask is a few hundred runs, a couple of KB instead of a dense float mask per bubble.
+    """
+    __slots__ = ('shape', 'runs')
+
+    def __init__(self, shape, runs):
+        self.shape = tuple(shape) # (h, w)
+        self.runs = runs
+
+    @classmethod
+    def from_array(cls, mask):
+        flat = mask.ravel() > 0
+        if not flat.size: return cls(mask.shape, np.zeros(1, dtype=np.uint32))
+        changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        bounds = np.concatenate(([0], changes, [flat.size]))
+        runs = np.diff(bounds)
+        if flat[0]: runs = np.concatenate(([0], runs)) # first run is always an off run
+        return cls(mask.shape, runs.astype(np.uint16 if flat.size < 65536 else np.uint32))
+
+    @classmethod
+    def from_polygons(cls, polygons, box):
+        """Rasterizes polygons in frame coordinates (YOLO's masks.xy) into the box."""
+        import cv2
+        x1, y1, x2, y2 = box
+        mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+        points = [np.round(p - (x1, y1)).astype(np.int32) for p in polygons if len(p) >= 3]
+        if points: cv2.fillPoly(mask, points, 1)
+        return cls.from_array(mask)
+
+    def to_bool(self):
+        values = np.zeros(len(self.runs), dtype=bool)
+        values[1::2] = True
+        return np.repeat(values, self.runs).reshape(self.shape)
+
+    def to_array(self):
+        """uint8 mask with 255 for bubble pixels, what PIL wants for paste masks."""
+        return self.to_bool().view(np.uint8) * np.uint8(255)
+
+    def paint(self, region, value):
+        # region is the box sized slice of a frame sized array
+        region[self.to_bool()] = value
+
+    def area(self) -> int:
+        return int(self.runs[1::2].sum())
+
+    @property
+    def nbytes(self) -> int:
+        return self.runs.nbytes
+
+    def to_dict(self) -> dict:
+        return dict(shape=list(self.shape), runs=self.runs.tolist())
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['shape'], np.asarray(data['runs'], dtype=np.uint32))
+
+    def __repr__(self):
+        return f"RleMask(shape={self.shape}, runs={len(self.runs)})"
@@ -0,0 +1,404 @@
+import gc
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+# torch, transformers, ultralytics and manga_ocr take seconds to import, they are imported by the functions that
+# load models so the window can come up first
+from threads_logic import THREAD_BUDGET
+from translation_logic import SOURCE_LANGUAGE, DEFAULT_TARGET_LANGUAGE, translation_model_name
+
+#globals
+TRANSLATION_MODEL_NAME = translation_model_name(SOURCE_LANGUAGE, DEFAULT_TARGET_LANGUAGE)
+TRANSLATION_MODEL_PATH = './models'
+QUANTIZED_MODEL_PATH = './models/quantized'
+BUBBLE_PATH = './models/bubble_model.pt'
+SNAPSHOT_PATH = './models/snapshot' # written by main.py --compile-snapshot
+SNAPSHOT_MANIFEST = 'manifest.json'
+SNAPSHOT_WEIGHTS = 'weights.pt'
+MIN_IDLE_SECONDS = 30 # the memory budget never evicts a model that was used more recently than this
+JANITOR_INTERVAL = 10
+MAX_RESIDENT_TRANSLATORS = 2 # language pairs kept in memory, switching back and forth between two is free
+
+
+def process_rss_mb() -> float:
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+class ModelRegistry(Mapping):
+    """Drop-in for the models dict. Models load on first use and are dropped again after idle_timeout seconds
+    without use or, least recently used first, while the process RSS is over memory_budget_mb.
+    The next lookup reloads them, reload times are kept and reported through on_event.
+    """
+    def __init__(self, loaders: dict, values: dict = None, idle_timeout=0, memory_budget_mb=0, on_event=print):
+        self._loaders = loaders # key -> callable that builds the model
+        self._values = dict(values or {}) # always resident, device name, tokenizer
+        self._models = {}
+        self._last_used = {}
+        self._locks = {key: threading.Lock() for key in loaders}
+        self.idle_timeout = idle_timeout
+        self.memory_budget_mb = memory_budget_mb
+        self.on_event = on_event
+        self.load_times = {} # key -> seconds of every load, the first one is the startup load
+        self.evictions = 0
+        self._janitor = None
+        self._janitor_stop = threading.Event()
+
+    def __getitem__(self, key):
+        if key in self._values: return self._values[key]
+        if key not in self._loaders: raise KeyError(key)
+        self._last_used[key] = time.monotonic()
+        model = self._models.get(key)
+        if model is not None: return model
+
+        with self._locks[key]:
+            model = self._models.get(key)
+            if model is None:
+                reload = key in self.load_times
+                start = time.perf_counter()
+                model = self._loaders[key]()
+                seconds = time.perf_counter() - start
+                self.load_times.setdefault(key, []).append(seconds)
+                self._models[key] = model
+                if reload: self.on_event(f"Reloaded {key} in {seconds:.1f} s")
+        return model
+
+    def __contains__(self, key):
+        # membership must not trigger a load
+        return key in self._values or key in self._loaders
+
+    def __iter__(self):
+        return iter(list(self._values) + list(self._loaders))
+
+    def __len__(self):
+        return len(self._values) + len(self._loaders)
+
+    def loaded(self) -> list:
+        return list(self._models)
+
+    def preload(self, keys=None):
+        for key in keys or self._loaders:
+            self[key]
+
+    def evict(self, key) -> bool:
+        with self._locks[key]:
+            if self._models.pop(key, None) is None: return False
+        self.evictions += 1
+        gc.collect()
+        torch = sys.modules.get('torch')
+        if torch is not None and torch.cuda.is_available(): torch.cuda.empty_cache()
+        return True
+
+    def check(self):
+        """Evicts idle models, then one model at a time while over the memory budget."""
+        now = time.monotonic()
+        if self.idle_timeout:
+            for key in self.loaded():
+                idle = now - self._last_used.get(key, now)
+                if idle > self.idle_timeout and self.evict(key):
+                    self.on_event(f"Unloaded {key} after {idle:.0f} s idle")
+            # resident values that manage models of their own (TranslatorRegistry)
+            for value in self._values.values():
+                if hasattr(value, 'evict_idle'):
+                    for name in value.evict_idle(self.idle_timeout):
+                        self.on_event(f"Unloaded {name} after {self.idle_timeout:.0f} s idle")
+
+        if self.memory_budget_mb:
+            rss = process_rss_mb()
+            if rss <= self.memory_budget_mb: return
+            # only one per check, freed memory takes a moment to show up in RSS
+            # (last use, owner, key), translator pairs compete with our own models, they are usually the biggest
+            candidates = [(self._last_used.get(k, 0), self, k) for k in self.loaded() if now - self._last_used.get(k, now) > MIN_IDLE_SECONDS]
+            for value in self._values.values():
+                if hasattr(value, 'idle_pairs'):
+                    candidates.extend((used, value, pair) for pair, used in value.idle_pairs(MIN_IDLE_SECONDS).items())
+            if candidates:
+                _, owner, key = min(candidates, key=lambda candidate: candidate[0])
+                if owner.evict(key):
+                    name = key if owner is self else translation_model_name(*key)
+                    self.on_event(f"Unloaded {name}, RSS {rss:.0f} MB over the {self.memory_budget_mb} MB budget")
+
+    def start_janitor(self, interval=JANITOR_INTERVAL):
+        if self._janitor is not None or not (self.idle_timeout or self.memory_budget_mb): return
+        def run():
+            while not self._janitor_stop.wait(interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    self.on_event(f"Model registry check failed: {e}")
+        self._janitor = threading.Thread(target=run, daemon=True)
+        self._janitor.start()
+
+    def stop_janitor(self):
+        self._janitor_stop.set()
+
+    def report(self) -> str:
+        lines = []
+        for key in self._loaders:
+            times = self.load_times.get(key, [])
+            state = 'loaded' if key in self._models else 'unloaded'
+            line = f"{key}: {state}"
+            if times: line += f", first load {times[0]:.1f} s"
+            if len(times) > 1: line += f", {len(times) - 1} reloads avg {sum(times[1:]) / (len(times) - 1):.1f} s"
+            lines.append(line)
+        try:
+            lines.append(f"RSS {process_rss_mb():.0f} MB" + (f" of {self.memory_budget_mb} MB budget" if self.memory_budget_mb else ""))
+        except ImportError:
+            pass
+        for value in self._values.values():
+            if hasattr(value, 'report'): lines.append(value.report())
+        return "\n".join(lines)
+
+
+class TranslatorRegistry:
+    """Tokenizer + translator per (source, target) language pair, loaded on first use from the local cache dir.
+    At most max_resident pairs stay loaded, the least recently used one goes first.
+    """
+    def __init__(self, device, quantize=False, cache_dir=TRANSLATION_MODEL_PATH, max_resident=MAX_RESIDENT_TRANSLATORS,
+                 target=DEFAULT_TARGET_LANGUAGE, on_event=print, snapshot_dir=SNAPSHOT_PATH):
+        self.device = device
+        self.quantize = quantize
+        self.cache_dir = cache_dir
+        self.snapshot_dir = snapshot_dir # None = always load the hub checkpoints
+        self.max_resident = max_resident
+        self.on_event = on_event
+        self._target = target
+        self._backends = OrderedDict() # pair -> (tokenizer, model)
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self.load_times = {} # pair -> seconds of every load
+
+    def get_target_language(self) -> str: return self._target
+    def set_target_language(self, target: str): self._target = target
+    def get_pair(self) -> tuple: return (SOURCE_LANGUAGE, self._target)
+
+    def get(self, pair=None):
+        """(tokenizer, model) for the pair, the current one by default."""
+        pair = tuple(pair or self.get_pair())
+        with self._lock:
+            # one lock for all pairs, two threads asking for a new pair must not load it twice
+            self._last_used[pair] = time.monotonic()
+            backend = self._backends.get(pair)
+            if backend is not None:
+                self._backends.move_to_end(pair)
+                return backend
+
+            model_name = translation_model_name(*pair)
+            start = time.perf_counter()
+            snapshot = _translator_snapshot_name(pair)
+            if self.snapshot_dir and not self.quantize and self.device == 'cpu' and snapshot_available(snapshot, self.snapshot_dir):
+                tokenizer, model = load_snapshot_translator(os.path.join(self.snapshot_dir, snapshot))
+            else:
+                from transformers import MarianTokenizer
+                tokenizer = MarianTokenizer.from_pretrained(model_name, cache_dir=self.cache_dir)
+                model = load_translator(model_name, self.device, self.quantize, self.cache_dir)
+            seconds = time.perf_counter() - start
+            self.load_times.setdefault(pair, []).append(seconds)
+            if len(self.load_times) > 1 or len(self.load_times[pair]) > 1:
+                self.on_event(f"Loaded {model_name} in {seconds:.1f} s")
+
+            self._backends[pair] = (tokenizer, model)
+            while len(self._backends) > self.max_resident:
+                old_pair, _ = self._backends.popitem(last=False)
+                self.on_event(f"Unloaded {translation_model_name(*old_pair)}")
+            return self._backends[pair]
+
+    def loaded(self) -> list:
+        return list(self._backends)
+
+    def idle_pairs(self, min_idle) -> dict:
+        # pair -> last use of the loaded pairs unused for min_idle seconds, for the ModelRegistry memory budget
+        now = time.monotonic()
+        with self._lock:
+            return {pair: self._last_used.get(pair, now) for pair in self._backends if now - self._last_used.get(pair, now) > min_idle}
+
+    def evict(self, pair) -> bool:
+        with self._lock:
+            if self._backends.pop(pair, None) is None: return False
+        gc.collect()
+        torch = sys.modules.get('torch')
+        if torch is not None and torch.cuda.is_available(): torch.cuda.empty_cache()
+        return True
+
+    def evict_idle(self, timeout) -> list:
+        now = time.monotonic()
+        with self._lock:
+            idle = [p for p in self._backends if now - self._last_used.get(p, now) > timeout]
+            for pair in idle: del self._backends[pair]
+        if idle: gc.collect()
+        return [translation_model_name(*pair) for pair in idle]
+
+    def report(self) -> str:
+        lines = []
+        for pair, times in self.load_times.items():
+            state = 'loaded' if pair in self._backends else 'unloaded'
+            lines.append(f"{'-'.join(pair)} translator: {state}, {len(times)} loads avg {sum(times) / len(times):.1f} s")
+        return "\n".join(lines) if lines else "No translator loaded"
+
+
+
+def quantize_translator(model):
+    import torch
+    # int8 weights for every nn.Linear, activations are quantized on the fly
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _quantized_cache_file(model_name: str) -> str:
+    import torch
+    # torch version is part of the name, packed weights are not portable between releases
+    safe_name = model_name.replace('/', '--')
+    return os.path.join(QUANTIZED_MODEL_PATH, f"{safe_name}-int8-torch{torch.__version__.split('+')[0]}.pt")
+
+def load_quantized_translator(model_name: str, cache_dir: str = TRANSLATION_MODEL_PATH):
+    """Returns int8 MarianMTModel, converting it once and reusing the cached weights afterwards."""
+    import torch
+    from transformers import MarianMTModel, MarianConfig
+    from transformers.modeling_utils import no_init_weights
+    cache_file = _quantized_cache_file(model_name)
+
+    if os.path.exists(cache_file):
+        # build the module skeleton without reading the fp32 checkpoint, then load packed weights
+        config = MarianConfig.from_pretrained(model_name, cache_dir=cache_dir)
+        with no_init_weights():
+            model = quantize_translator(MarianMTModel(config))
+        model.load_state_dict(torch.load(cache_file, map_location='cpu'))
+        return model.eval()
+
+    model = quantize_translator(MarianMTModel.from_pretrained(model_name, cache_dir=cache_dir))
+    os.makedirs(QUANTIZED_MODEL_PATH, exist_ok=True)
+    torch.save(model.state_dict(), cache_file)
+    return model
+
+def load_translator(model_name: str, device: str, quantize: bool = False, cache_dir: str = TRANSLATION_MODEL_PATH):
+    from transformers import MarianMTModel
+    # dynamic quantization only has CPU kernels, CUDA keeps full precision
+    if quantize and device == 'cpu':
+        return load_quantized_translator(model_name, cache_dir)
+    if quantize:
+        print('Quantized mode is CPU only, loading fp32 translator')
+    return MarianMTModel.from_pretrained(model_name, cache_dir=cache_dir).to(device).eval()
+
+# snapshots: config, tokenizer files and a torch zip state_dict per model. Loading maps the weights file instead of
+# copying it, so startup skips checkpoint parsing and app instances on one machine share the pages via the OS cache.
+# CPU fp32 only, quantized packed weights and CUDA copies can't point at a mapped file.
+
+def _snapshot_versions() -> dict:
+    import torch
+    import transformers
+    return dict(torch=torch.__version__, transformers=transformers.__version__)
+
+def _translator_snapshot_name(pair) -> str:
+    return 'translator-{}-{}'.format(*pair)
+
+def snapshot_available(name: str, snapshot_dir: str = SNAPSHOT_PATH) -> bool:
+    manifest = os.path.join(snapshot_dir, name, SNAPSHOT_MANIFEST)
+    if not os.path.exists(manifest): return False
+    with open(manifest, encoding='utf-8') as f:
+        return json.load(f) == _snapshot_versions() # pickled module layouts can change between releases
+
+def _save_snapshot(path: str, model, *artifacts):
+    import torch
+    os.makedirs(path, exist_ok=True)
+    model.config.save_pretrained(path)
+    model.generation_config.save_pretrained(path)
+    for artifact in artifacts:
+        artifact.save_pretrained(path)
+    torch.save({k: v.cpu() for k, v in model.state_dict().items()}, os.path.join(path, SNAPSHOT_WEIGHTS))
+    # manifest last, a half written snapshot is never picked up
+    with open(os.path.join(path, SNAPSHOT_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(_snapshot_versions(), f)
+
+def _load_mmap_weights(model, path: str):
+    import torch
+    from transformers import GenerationConfig
+    # the skeleton was built without init, assign swaps its empty tensors for the mapped ones
+    state = torch.load(os.path.join(path, SNAPSHOT_WEIGHTS), map_location='cpu', mmap=True, weights_only=True)
+    model.load_state_dict(state, assign=True)
+    model.tie_weights()
+    model.generation_config = GenerationConfig.from_pretrained(path)
+    return model.eval()
+
+def load_snapshot_translator(path: str):
+    from transformers import MarianMTModel, MarianTokenizer, MarianConfig
+    from transformers.modeling_utils import no_init_weights
+    with no_init_weights():
+        model = MarianMTModel(MarianConfig.from_pretrained(path))
+    return MarianTokenizer.from_pretrained(path), _load_mmap_weights(model, path)
+
+def load_snapshot_ocr(path: str):
+    from manga_ocr import MangaOcr
+    from transformers import AutoTokenizer, ViTImageProcessor, VisionEncoderDecoderConfig, VisionEncoderDecoderModel
+    from transformers.modeling_utils import no_init_weights
+    with no_init_weights():
+        model = VisionEncoderDecoderModel(VisionEncoderDecoderConfig.from_pretrained(path))
+    # MangaOcr only works with these three, its __init__ would parse the hub checkpoint again
+    ocr = MangaOcr.__new__(MangaOcr)
+    ocr.processor = ViTImageProcessor.from_pretrained(path)
+    ocr.tokenizer = AutoTokenizer.from_pretrained(path)
+    ocr.model = _load_mmap_weights(model, path)
+    return ocr
+
+def load_ocr(device: str, snapshot_dir: str = SNAPSHOT_PATH):
+    if snapshot_dir and device == 'cpu' and snapshot_available('ocr', snapshot_dir):
+        return load_snapshot_ocr(os.path.join(snapshot_dir, 'ocr'))
+    from manga_ocr import MangaOcr
+    return MangaOcr()
+
+def compile_snapshot(target_languages=(DEFAULT_TARGET_LANGUAGE,), snapshot_dir: str = SNAPSHOT_PATH) -> dict:
+    """Exports MangaOcr and the translators of the given targets, returns seconds per exported model."""
+    from manga_ocr import MangaOcr
+    from transformers import MarianMTModel, MarianTokenizer
+    os.environ['HF_HOME'] = TRANSLATION_MODEL_PATH
+    times = {}
+    start = time.perf_counter()
+    ocr = MangaOcr()
+    _save_snapshot(os.path.join(snapshot_dir, 'ocr'), ocr.model, ocr.processor, ocr.tokenizer)
+    times['ocr'] = time.perf_counter() - start
+
+    for target in target_languages:
+        start = time.perf_counter()
+        pair = (SOURCE_LANGUAGE, target)
+        model_name = translation_model_name(*pair)
+        tokenizer = MarianTokenizer.from_pretrained(model_name, cache_dir=TRANSLATION_MODEL_PATH)
+        model = MarianMTModel.from_pretrained(model_name, cache_dir=TRANSLATION_MODEL_PATH)
+        _save_snapshot(os.path.join(snapshot_dir, _translator_snapshot_name(pair)), model, tokenizer)
+        times[model_name] = time.perf_counter() - start
+    # YOLO stays on its checkpoint, ultralytics rebuilds and fuses the module on load so mapped weights would be copied anyway
+    return times
+
+def load_models(quantize: bool = False, thread_budget=THREAD_BUDGET, idle_timeout=0, memory_budget_mb=0,
+                target_language=DEFAULT_TARGET_LANGUAGE, snapshot_dir=SNAPSHOT_PATH):
+    """ModelRegistry with every model loaded, {} if loading failed. idle_timeout / memory_budget_mb enable unloading,
+    models in snapshot_dir are memory mapped instead of loaded from their checkpoints (None to skip snapshots).
+    """
+    try:
+        import torch
+        from ultralytics import YOLO
+        DEVICE='cuda' if torch.cuda.is_available() else 'cpu'
+        thread_budget.apply()
+        print(f'Thread budget: {thread_budget.describe()}')
+
+        os.environ['TRANSFORMERS_CACHE'] = TRANSLATION_MODEL_PATH
+        os.environ['HF_HOME'] = TRANSLATION_MODEL_PATH
+        models = ModelRegistry(
+            loaders={
+                'ocr': lambda: load_ocr(DEVICE, snapshot_dir),
+                'bubble': lambda: YOLO(BUBBLE_PATH),
+            },
+            values={
+                # per language pair, loaded lazily with its own LRU cap
+                'translators': TranslatorRegistry(DEVICE, quantize, target=target_language, snapshot_dir=snapshot_dir),
+                'device': DEVICE,
+            },
+            idle_timeout=idle_timeout, memory_budget_mb=memory_budget_mb)
+        models.preload()
+        models['translators'].get() # the current pair is needed right away anyway
+        models.start_janitor()
+        return models
+    except Exception as e:
+        print(f'Models not loaded {e}')
+        return {}
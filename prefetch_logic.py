@@ -0,0 +1,92 @@
+import threading
+import time
+import numpy as np
+from cache_logic import frame_fingerprint
+from store_logic import PAGE_STORE, page_variant
+
+PREFETCH_PAGES = 3 # pages translated ahead of the one being read
+PREFETCH_MEMORY_MB = 4096 # no prefetching while the process uses more than this
+PREFETCH_CPU_SHARE = 0.5 # most of the wall time prefetching may keep the models busy
+PREFETCH_REGION = 'prefetch'
+
+
+class PrefetchScheduler:
+    """Translates the pages after the one being read into the page store, so turning to them needs no model.
+
+    Runs on its own thread with a background engine, whose model calls only get the shared backend while no live
+    region has anything waiting. A page turn restarts it from the new page. It rests after each page so it uses at
+    most cpu_share of the time, and pauses while the process RSS is over memory_budget_mb.
+    """
+    def __init__(self, engine, reader, lookahead=PREFETCH_PAGES, memory_budget_mb=PREFETCH_MEMORY_MB, cpu_share=PREFETCH_CPU_SHARE):
+        self.engine = engine # TranslationEngine(background=True), never started, only translate_page() is used
+        self.reader = reader
+        self.lookahead = lookahead
+        self.memory_budget_mb = memory_budget_mb
+        self.cpu_share = max(0.05, min(1.0, cpu_share))
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.prefetched = 0
+        self.already_stored = 0
+        self.memory_pauses = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        self.reader.add_listener(self._wake.set)
+        self._wake.set()
+        self.thread.start()
+
+    def stop(self, wait=False, timeout=1.0):
+        self._stop_event.set()
+        self._wake.set()
+        self.engine.stop()
+        if wait and self.thread.is_alive(): self.thread.join(timeout)
+
+    def _run_loop(self):
+        while not self._stop_event.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop_event.is_set(): break
+            try:
+                self._prefetch_ahead()
+            except Exception as e:
+                if self._stop_event.is_set(): break # the archive closed under us
+                self.engine.manager.output_callback(f"Prefetching stopped: {e}")
+                break
+
+    def _over_memory(self) -> bool:
+        if not self.memory_budget_mb: return False
+        from model_logic import process_rss_mb
+        return process_rss_mb() > self.memory_budget_mb
+
+    def _prefetch_ahead(self):
+        current = self.reader.index
+        for index in range(current + 1, min(len(self.reader), current + 1 + self.lookahead)):
+            # a page turn sets _wake, start over from the new page instead
+            if self._stop_event.is_set() or self._wake.is_set(): return
+            if not self.engine.manager.MODELS_LOADED: return
+            if self._over_memory():
+                self.memory_pauses += 1
+                return # the next page turn tries again
+
+            page = self.reader.load(index)
+            frame = np.asarray(page)
+            fingerprint = frame_fingerprint(frame)
+            variant = page_variant(self.engine.models, self.engine.manager.get_decoding_profile())
+            if PAGE_STORE.contains(fingerprint, variant, frame):
+                self.already_stored += 1
+                continue
+
+            start = time.perf_counter()
+            result = self.engine.translate_page(page, fingerprint=fingerprint, frame=frame)
+            busy = time.perf_counter() - start
+            self.busy_seconds += busy
+            if result is None or self._stop_event.is_set(): return
+            self.prefetched += 1
+
+            # cpu_share 0.5 rests as long as the page took, a page turn cuts the rest short
+            self._wake.wait(busy * (1 - self.cpu_share) / self.cpu_share)
+
+    def report(self) -> str:
+        return (f"Prefetch: {self.prefetched} pages translated ahead, {self.already_stored} already stored, "
+                f"{self.busy_seconds:.1f} s of model time, {self.memory_pauses} pauses over the memory budget")
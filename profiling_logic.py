@@ -0,0 +1,238 @@
+import builtins
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+STARTUP_T0_ENV = 'MANGA_TRANSLATOR_T0' # survives the execv into the venv, so the restart counts too
+STARTUP_METRICS_PATH = './logs/startup.jsonl'
+TOP_IMPORTS = 12
+MEMORY_SAMPLES_PATH = './logs/memory.jsonl'
+MEMORY_DUMP_DIR = './logs/memory'
+MEMORY_TOP = 10 # allocation sites kept per sample
+MEMORY_TRACE_FRAMES = 5 # stack depth tracemalloc records, deeper finds the real caller but costs more
+SNAPSHOT_IGNORED = (tracemalloc.__file__, '*/linecache.py', '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>')
+MEMORY_DUMP_KEYS = ["Control", "Shift", "M"] # only registered with --memory-profile
+# what a frame leaves behind if something holds on to it: captures, YOLO results and their mask tensors, our results
+TRACKED_TYPES = ('Image', 'PngImageFile', 'FrameResult', 'BubbleResult', 'RleMask', 'Results', 'Masks', 'Boxes', 'Tensor')
+
+
+def mark_process_start() -> float:
+    # first call wins, the restarted interpreter keeps the original start time
+    os.environ.setdefault(STARTUP_T0_ENV, repr(time.time()))
+    return float(os.environ[STARTUP_T0_ENV])
+
+
+class StartupProfiler:
+    """Import times per top level package, named init phases and time-to-window, all relative to process start."""
+    def __init__(self):
+        self.imports = {} # top level package -> seconds, nested imports count towards the outer one
+        self.phases = [] # (name, seconds since start, duration)
+        self.marks = {} # name -> seconds since start
+        self._original_import = None
+        self._local = threading.local() # import nesting depth per thread, models load on a worker thread
+
+    @property
+    def t0(self) -> float:
+        return float(os.environ.get(STARTUP_T0_ENV) or mark_process_start())
+
+    def elapsed(self) -> float:
+        return time.time() - self.t0
+
+    def install_import_timer(self):
+        if self._original_import is not None: return
+        original = self._original_import = builtins.__import__
+        local = self._local
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # only first time, absolute, outermost imports
+            if level or getattr(local, 'depth', 0) or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            local.depth = 1
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                local.depth = 0
+                package = name.partition('.')[0]
+                self.imports[package] = self.imports.get(package, 0.0) + time.perf_counter() - start
+
+        builtins.__import__ = timed_import
+
+    def remove_import_timer(self):
+        if self._original_import is None: return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+
+    @contextmanager
+    def phase(self, name):
+        offset = self.elapsed()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, offset, time.perf_counter() - start))
+
+    def mark(self, name):
+        self.marks[name] = self.elapsed()
+
+    def report(self) -> str:
+        lines = ["Startup profile (seconds since process start):"]
+        if self.imports:
+            lines.append(f"  imports, top {TOP_IMPORTS} of {len(self.imports)} packages, {sum(self.imports.values()):.2f} s total:")
+            for package, seconds in sorted(self.imports.items(), key=lambda item: -item[1])[:TOP_IMPORTS]:
+                lines.append(f"    {package:<24}{seconds:>7.3f}")
+        lines.append("  phases:")
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"    {name:<24}{duration:>7.3f}  (at {offset:.2f})")
+        for name, offset in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"  {name:<26}{offset:>7.3f}")
+        return "\n".join(lines)
+
+    def write_metrics(self, path=STARTUP_METRICS_PATH, **extra):
+        # one line per start, time_to_window is the number to watch
+        record = dict(timestamp=time.time(), **self.marks, phases={name: round(d, 4) for name, _, d in self.phases},
+                      imports=round(sum(self.imports.values()), 4), **extra)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError:
+            pass # metrics never break a start
+
+
+def count_objects(type_names=TRACKED_TYPES) -> dict:
+    """Live objects per type name, one pass over everything the garbage collector tracks."""
+    wanted = set(type_names)
+    counts = dict.fromkeys(type_names, 0)
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in wanted: counts[name] += 1
+    return counts
+
+
+class MemoryProfiler:
+    """Opt-in memory instrumentation for long sessions.
+
+    Every every_frames processed frames it records RSS, tracemalloc totals, the top allocation sites and the counts
+    of the engine's intermediate types to ./logs/memory.jsonl. dump() writes a readable snapshot any time, with the
+    growth per allocation site since the previous dump, which is usually where a leak shows. Off (the default)
+    on_frame() is one attribute check.
+    """
+    def __init__(self):
+        self.every_frames = 0
+        self.top = MEMORY_TOP
+        self.path = MEMORY_SAMPLES_PATH
+        self.samples = deque(maxlen=1000)
+        self.gauges = {} # name -> fn() -> number, for things outside the engine like the console line count
+        self._frames = 0
+        self._lock = threading.Lock() # several regions count frames
+        self._last_snapshot = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.every_frames > 0
+
+    def enable(self, every_frames, top=MEMORY_TOP, trace_frames=MEMORY_TRACE_FRAMES, path=MEMORY_SAMPLES_PATH):
+        self.every_frames, self.top, self.path = every_frames, top, path
+        if every_frames > 0 and not tracemalloc.is_tracing(): tracemalloc.start(trace_frames)
+
+    def disable(self):
+        self.every_frames = 0
+        if tracemalloc.is_tracing(): tracemalloc.stop()
+        self._last_snapshot = None
+
+    def add_gauge(self, name, fn):
+        self.gauges[name] = fn
+
+    def on_frame(self):
+        if not self.every_frames: return
+        with self._lock:
+            self._frames += 1
+            due = self._frames % self.every_frames == 0
+        if due: self.sample()
+
+    def _snapshot(self):
+        # our own bookkeeping and module loading would top every list, they are left out
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, pattern) for pattern in SNAPSHOT_IGNORED])
+
+    def _rss_mb(self) -> float:
+        try:
+            from model_logic import process_rss_mb
+            return process_rss_mb()
+        except Exception:
+            return 0.0 # psutil missing, tracemalloc still works
+
+    def _gauge_values(self) -> dict:
+        values = {}
+        for name, fn in self.gauges.items():
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = None
+        return values
+
+    def sample(self) -> dict:
+        record = dict(timestamp=time.time(), frames=self._frames, rss_mb=round(self._rss_mb(), 1),
+                      objects=count_objects(), gauges=self._gauge_values())
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            stats = self._snapshot().statistics('lineno')[:self.top]
+            record.update(traced_mb=round(current / (1024 * 1024), 1), traced_peak_mb=round(peak / (1024 * 1024), 1),
+                          top=[dict(site=str(stat.traceback[0]), kb=round(stat.size / 1024), count=stat.count) for stat in stats])
+        self.samples.append(record)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError:
+            pass
+        return record
+
+    def dump(self, folder=MEMORY_DUMP_DIR) -> str:
+        """Writes a snapshot report (and the raw tracemalloc snapshot for Snapshot.load) and returns the report path."""
+        os.makedirs(folder, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(folder, f"memory-{stamp}.txt")
+        lines = [f"Memory snapshot {stamp}, {self._frames} frames", self.report(), ""]
+        if tracemalloc.is_tracing():
+            snapshot = self._snapshot()
+            snapshot.dump(os.path.join(folder, f"memory-{stamp}.tracemalloc"))
+            lines.append(f"Top {self.top * 2} allocation sites:")
+            for stat in snapshot.statistics('traceback')[:self.top * 2]:
+                lines.append(f"  {stat.size / 1024:10.0f} KB {stat.count:8d} blocks")
+                lines.extend(f"      {line}" for line in stat.traceback.format())
+            if self._last_snapshot is not None:
+                lines.append("")
+                lines.append("Growth since the last dump:")
+                for stat in snapshot.compare_to(self._last_snapshot, 'lineno')[:self.top * 2]:
+                    lines.append(f"  {stat.size_diff / 1024:+10.0f} KB {stat.count_diff:+8d} blocks  {stat.traceback[0]}")
+            self._last_snapshot = snapshot
+        else:
+            lines.append("tracemalloc is off, start with --memory-profile N for allocation sites")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def report(self) -> str:
+        objects = count_objects()
+        lines = [f"RSS {self._rss_mb():.0f} MB" + (f", traced {tracemalloc.get_traced_memory()[0] / (1024 * 1024):.1f} MB"
+                                                  if tracemalloc.is_tracing() else "")]
+        first = self.samples[0]['objects'] if self.samples else {}
+        lines.append("Live objects: " + ", ".join(
+            f"{name} {count}" + (f" ({count - first[name]:+d})" if name in first else "") for name, count in objects.items() if count or first.get(name)))
+        gauges = self._gauge_values()
+        if gauges: lines.append(", ".join(f"{name} {value}" for name, value in gauges.items()))
+        if len(self.samples) > 1:
+            growth = self.samples[-1]['rss_mb'] - self.samples[0]['rss_mb']
+            lines.append(f"RSS {growth:+.0f} MB over {self.samples[-1]['frames'] - self.samples[0]['frames']} frames since the first sample")
+        return "\n".join(lines)
+
+
+STARTUP_PROFILER = StartupProfiler()
+MEMORY_PROFILER = MemoryProfiler()
@@ -0,0 +1,71 @@
+import time
+from mask_logic import RleMask
+
+
+class BubbleResult:
+    """One detected bubble. box is (x1, y1, x2, y2) in frame pixels, mask is a box local RleMask."""
+    __slots__ = ('box', 'mask', 'ocr_text', 'translation', 'timings', 'track_id', 'crop_hash')
+
+    def __init__(self, box, mask=None, ocr_text=None, translation=None):
+        self.box = box
+        self.track_id = None # same id for the same bubble across frames
+        self.mask = mask
+        self.ocr_text = ocr_text
+        self.translation = translation # None until translated, e.g. when it ran out of frame budget
+        self.crop_hash = None # cache_logic.crop_hash of the box when it was detected
+        self.timings = {}
+
+    def to_dict(self) -> dict:
+        return dict(box=list(self.box), track_id=self.track_id, ocr_text=self.ocr_text, translation=self.translation,
+                    crop_hash=self.crop_hash, timings=dict(self.timings), mask=self.mask.to_dict() if self.mask is not None else None)
+
+    @classmethod
+    def from_dict(cls, data):
+        # track ids belong to one engine run, they are not restored
+        mask = RleMask.from_dict(data['mask']) if data.get('mask') else None
+        bubble = cls(tuple(data['box']), mask, data.get('ocr_text'), data.get('translation'))
+        bubble.timings = dict(data.get('timings') or {})
+        bubble.crop_hash = data.get('crop_hash')
+        return bubble
+
+    def __repr__(self):
+        return f"BubbleResult(box={self.box}, ocr_text={self.ocr_text!r}, translation={self.translation!r})"
+
+
+class FrameResult:
+    """Everything the engine found in one frame, rendering is a separate step."""
+    __slots__ = ('frame_id', 'size', 'bubbles', 'timings', 'timestamp', 'complete')
+
+    def __init__(self, size, frame_id=0):
+        self.frame_id = frame_id
+        self.size = size # (width, height)
+        self.bubbles = []
+        self.timings = {}
+        self.timestamp = time.time()
+        self.complete = True
+
+    def translations(self) -> list[str]:
+        return [b.translation for b in self.bubbles if b.translation is not None]
+
+    def to_text(self) -> str:
+        lines = []
+        for i, bubble in enumerate(self.bubbles, 1):
+            if bubble.translation is None: continue
+            lines.append(f"{i}. {bubble.translation}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return dict(frame_id=self.frame_id, size=list(self.size), timestamp=self.timestamp, complete=self.complete,
+                    timings=dict(self.timings), bubbles=[b.to_dict() for b in self.bubbles])
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(tuple(data['size']), frame_id=data.get('frame_id', 0))
+        result.timestamp = data.get('timestamp', result.timestamp)
+        result.complete = data.get('complete', True)
+        result.timings = dict(data.get('timings') or {})
+        result.bubbles = [BubbleResult.from_dict(b) for b in data.get('bubbles', ())]
+        return result
+
+    def __repr__(self):
+        return f"FrameResult(frame_id={self.frame_id}, size={self.size}, bubbles={len(self.bubbles)})"
@@ -1,56 +1,69 @@
 import tkinter as tk
-import numpy as np
 import threading
 import time
-from pynput import keyboard
-from PIL import ImageGrab, Image, ImageTk, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image, ImageTk, ImageDraw, ImageFont, ImageStat
+from capture_logic import grab_region
+from cache_logic import OCR_CACHE, crop_hash, frame_fingerprint
+from threads_logic import THREAD_BUDGET
+from hotkey_logic import HOTKEYS
+from store_logic import PAGE_STORE, page_variant
+from result_logic import BubbleResult, FrameResult
+import translation_logic
+from translation_logic import DEFAULT_SNIP_PROFILE
 
 CUSTOM_FONT_PATH = './fonts/PermanentMarker-Regular.ttf'
 
-def keys_to_pynput_set(key_strings: list[str]) -> set:
-    pynput_set = set()
-    for key_str in key_strings:
-        key_upper = key_str.upper()
-        if key_upper == "CONTROL": pynput_set.add(keyboard.Key.ctrl_l)
-        elif key_upper == "SHIFT": pynput_set.add(keyboard.Key.shift_l)
-        elif key_upper == "ALT": pynput_set.add(keyboard.Key.alt_l)
-        elif key_upper == "ESCAPE": pynput_set.add(keyboard.Key.esc)
-        else:
-            try:
-                pynput_set.add(keyboard.KeyCode.from_char(key_str.lower()))
-            except Exception:
-                pass
-    return pynput_set
-
-def translate_text(text: str, models: dict) -> str:
+def translate_text(text: str, models: dict, profile: str = DEFAULT_SNIP_PROFILE) -> str:
     if not text: return ""
     
-    tokenizer = models.get('tokenizer')
-    model = models.get('translator')
-    device = models.get('device', 'cpu')
-
-    if not tokenizer or not model:
+    if not translation_logic.has_translator(models):
         return text # Return original if models missing
 
     try:
-        inputs = tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=512).to(device)
-        tokens = model.generate(**inputs, max_length=100, num_beams=6, early_stopping=True, do_sample=False)
-        return tokenizer.decode(tokens[0], skip_special_tokens=True)
+        return translation_logic.translate_text(text, models, profile=profile)
     except Exception:
         return f"[Error]"
 
+def read_and_translate(img: Image, models: dict, profile: str = DEFAULT_SNIP_PROFILE) -> tuple:
+    """(source text, translation) of a snip, a snip of a known page area comes from the page store without any model."""
+    if not translation_logic.has_translator(models) or not models.get('ocr'):
+        text = _read_text_from_image(img, models.get('ocr'))
+        return text, translate_text(text, models, profile)
+
+    frame = np.asarray(img)
+    fingerprint = frame_fingerprint(frame)
+    variant = page_variant(models, profile, snip=True)
+    stored = PAGE_STORE.get(fingerprint, variant, frame)
+    if stored is not None and stored.bubbles:
+        return stored.bubbles[0].ocr_text, stored.bubbles[0].translation
+
+    text = _read_text_from_image(img, models.get('ocr'))
+    translated = translate_text(text, models, profile)
+    if text and text != "OCR Failed" and translated != "[Error]":
+        # the whole snip is stored as one bubble
+        w, h = img.size
+        result = FrameResult((w, h))
+        bubble = BubbleResult((0, 0, w, h), ocr_text=text, translation=translated)
+        bubble.crop_hash = crop_hash(frame, bubble.box)
+        result.bubbles.append(bubble)
+        PAGE_STORE.put(fingerprint, variant, result)
+    return text, translated
+
 def _read_text_from_image(img: Image, ocr_model) -> str:
     if not ocr_model:
         return "OCR Unavailable"
     try:
-        return ocr_model(img).strip()
+        with THREAD_BUDGET.stage('ocr'):
+            return OCR_CACHE.read(img, ocr_model).strip()
     except Exception as e:
         return f"OCR Failed"
 
 #fill cropped out image with avg color so it doesnt really THAT out of place
 def _get_mean_color_and_overlay_text(img: Image, text: str, font_path: str = CUSTOM_FONT_PATH) -> Image:
-    np_img = np.array(img.convert('RGB')) 
-    mean_color = tuple(map(int, np.mean(np_img, axis=(0, 1))))
+    # channel means straight from PIL, no array copy of the snip
+    rgb_img = img if img.mode == 'RGB' else img.convert('RGB')
+    mean_color = tuple(map(int, ImageStat.Stat(rgb_img).mean))
     
     luminance = (0.299 * mean_color[0] + 0.587 * mean_color[1] + 0.114 * mean_color[2]) #black/white text depends on lumiancne
     text_color = "black" if luminance > 128 else "white"
@@ -144,18 +157,10 @@ class SnipingTool(tk.Toplevel):
         if (x2 - x1) > 10 and (y2 - y1) > 10:
             self.withdraw()
             
-            capture = ImageGrab.grab(bbox=(x1, y1, x2, y2))
+            capture = grab_region((x1, y1, x2, y2))
             
-            models = self.manager.models
-            ocr_model = models.get('ocr')
-            
-
-            original_text = _read_text_from_image(capture, ocr_model)
-            translated_text = translate_text(original_text, models)
-            self.manager.log_translation_result(original_text, translated_text)
-
-            if self.manager.get_display_image():
-                display_img = _get_mean_color_and_overlay_text(capture, translated_text, CUSTOM_FONT_PATH)
+            display_img = self.manager.translate_capture(capture)
+            if display_img is not None:
                 self.display_feedback_window((x1, y1, x2, y2), display_img)
 
     def display_feedback_window(self, coords, display_img: Image):
@@ -178,19 +183,19 @@ class SnipingTool(tk.Toplevel):
 class SnippingHotkeyManager:
     def __init__(self):
         self.models = {}
-        self.current_keys = set()
         self.is_cropping_active = False
         
         self._display_original = True
         self._display_translated = True
         self._display_image = True
+        self._decoding_profile = DEFAULT_SNIP_PROFILE
         self._gui_output_callback = lambda x: None
+        self._load_error = None # set once loading finished without usable models
         
-        self._combination = [keyboard.Key.shift_l, keyboard.KeyCode.from_char('q')] 
+        self._combination = ["Shift", "Q"]
         
         self.root = None
         self.tk_thread = None
-        self.listener = None
         
     def set_models(self, model_dict):
         """Receives dependencies from Main UI."""
@@ -200,6 +205,7 @@ class SnippingHotkeyManager:
     def get_display_original(self): return self._display_original
     def get_display_translated(self): return self._display_translated
     def get_display_image(self): return self._display_image
+    def get_decoding_profile(self): return self._decoding_profile
     
     def set_display_translated_from_qt(self, s): self.set_display_translated(s == 2)
     def set_display_original_from_qt(self, s): self.set_display_original(s == 2)
@@ -209,27 +215,35 @@ class SnippingHotkeyManager:
     def set_display_original(self, v): self._display_original = v
     def set_display_translated(self, v): self._display_translated = v
     def set_display_image(self, v): self._display_image = v
+    def set_decoding_profile(self, v): self._decoding_profile = v
+    def get_load_error(self): return self._load_error
+    def set_load_error(self, message): self._load_error = message
         
+    def log_message(self, text: str): self._gui_output_callback(text)
+
+    def translate_capture(self, capture: Image):
+        """Everything a snip does after the grab: read, translate, log, and the overlay image when it is shown (else None)."""
+        original_text, translated_text = read_and_translate(capture, self.models, self._decoding_profile)
+        self.log_translation_result(original_text, translated_text)
+        if self._display_image:
+            return _get_mean_color_and_overlay_text(capture, translated_text, CUSTOM_FONT_PATH)
+        return None
+
     def log_translation_result(self, original_text: str, translated_text: str):
         parts = []
         if self._display_original: parts.append(f"Source: {original_text}")
-        if self._display_translated: parts.append(f"EN: {translated_text}")
+        if self._display_translated:
+            target = translation_logic.current_language_pair(self.models)[1]
+            parts.append(f"{target.upper()}: {translated_text}")
         if parts: self._gui_output_callback("\n".join(parts))
 
     @property
     def combination(self): return self._combination
 
     def set_combination(self, key_strings: list[str]):
-        pynput_keys = []
-        key_map = {"CONTROL": keyboard.Key.ctrl_l, "SHIFT": keyboard.Key.shift_l, "ALT": keyboard.Key.alt_l}
-        for k in key_strings:
-            u = k.upper()
-            if u in key_map: pynput_keys.append(key_map[u])
-            elif len(k) == 1 and k.isalpha(): pynput_keys.append(keyboard.KeyCode.from_char(k.lower()))
-            else:
-                 try: pynput_keys.append(getattr(keyboard.Key, k.lower()))
-                 except: pass
-        if len(pynput_keys) >= 2: self._combination = pynput_keys
+        if len(key_strings) < 2: return
+        self._combination = key_strings
+        HOTKEYS.register('snip', key_strings, self._launch_snipping_tool)
 
     def _tk_setup(self):
         self.root = tk.Tk()
@@ -240,29 +254,22 @@ class SnippingHotkeyManager:
         self.tk_thread = threading.Thread(target=self._tk_setup, daemon=True)
         self.tk_thread.start()
         time.sleep(0.1) 
-        self.listener = keyboard.Listener(on_press=self._on_key_press, on_release=self._on_key_release)
-        self.listener.start()
+        self.set_combination(self._combination)
+        HOTKEYS.start()
 
     def stop_listeners(self):
-        if self.listener: self.listener.stop()
+        HOTKEYS.unregister('snip')
         if self.root: self.root.quit()
         if self.tk_thread: self.tk_thread.join(1)
 
-    def _get_key_to_check(self, key):
-        if hasattr(key, 'char') and key.char: return keyboard.KeyCode.from_char(key.char.lower())
-        return key
-        
-    def _on_key_press(self, key):
-        k = self._get_key_to_check(key)
-        if k in self.combination: self.current_keys.add(k)
-        if all(x in self.current_keys for x in self.combination):
-            if not self.is_cropping_active: self._launch_snipping_tool()
-
-    def _on_key_release(self, key):
-        k = self._get_key_to_check(key)
-        if k in self.current_keys: self.current_keys.discard(k)
-
     def _launch_snipping_tool(self):
+        if self.is_cropping_active: return
+        if self._load_error:
+            self.log_message(f"Snipping unavailable: {self._load_error}")
+            return
+        if not self.models:
+            self.log_message("Models are still loading, snipping can start once they are loaded.")
+            return
         if self.root:
             self.is_cropping_active = True
             self.root.after(0, self._snipping_tool_launcher)
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from result_logic import FrameResult
+from cache_logic import crops_match, fingerprint_bits, nearest_fingerprint, same_frame
+from translation_logic import current_language_pair
+
+PAGE_STORE_PATH = './cache/pages.sqlite'
+PAGE_STORE_MB = 256
+LATENCY_SAMPLES = 1000 # lookups kept for the latency percentiles
+
+# the primary key leads with the fingerprint, so it is also the fingerprint index
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    fingerprint BLOB NOT NULL,
+    variant TEXT NOT NULL,
+    result BLOB NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (fingerprint, variant)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+"""
+
+
+def page_variant(models, profile: str, snip=False) -> str:
+    """What the stored translations depend on besides the page, 'ja-en/fast'.
+
+    Snips are stored as one maskless bubble, 'snip:ja-en/quality' keeps them apart from full live frames.
+    """
+    source, target = current_language_pair(models)
+    return f"{'snip:' if snip else ''}{source}-{target}/{profile}"
+
+
+class PageStore:
+    """SQLite table of page fingerprint -> full FrameResult (boxes, masks, OCR text, translations).
+
+    A page seen before is drawn straight from here without any model. Closed (the default) it stores nothing, so
+    benchmarks and tests never see results from earlier runs. Fingerprints match within FINGERPRINT_MAX_DISTANCE
+    bits, an in memory index of the stored keys finds the nearest one before the row is read. A page that isn't the
+    exact same pixels is only served when the stored bubbles' crop hashes still fit the frame.
+    """
+    def __init__(self, max_mb=PAGE_STORE_MB):
+        self.max_mb = max_mb
+        self.path = None
+        self._conn = None
+        self._lock = threading.Lock() # one connection shared by the engine, snipper and revalidation threads
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._index = {} # variant -> {fingerprint: fingerprint_bits}
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def open(self, path=PAGE_STORE_PATH):
+        self.close()
+        folder = os.path.dirname(path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL") # readers don't wait on a page being written
+        conn.execute("PRAGMA synchronous=NORMAL") # a crash may lose the last pages, never corrupts the file
+        conn.executescript(SCHEMA)
+        self._conn, self.path = conn, path
+        with self._lock:
+            self._load_index()
+
+    def _load_index(self):
+        # called with the lock held
+        self._index = {}
+        for fingerprint, variant in self._conn.execute("SELECT fingerprint, variant FROM pages"):
+            self._index.setdefault(variant, {})[bytes(fingerprint)] = fingerprint_bits(bytes(fingerprint))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None: self._conn.close()
+            self._conn = None
+            self._index = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def _find(self, fingerprint: bytes, variant: str, frame):
+        # called with the lock held, (stored key, FrameResult) or (None, None)
+        key = nearest_fingerprint(fingerprint, self._index.get(variant, {}))
+        if key is None: return None, None
+        row = self._conn.execute("SELECT result FROM pages WHERE fingerprint = ? AND variant = ?", (key, variant)).fetchone()
+        if row is None: return None, None
+        result = FrameResult.from_dict(json.loads(zlib.decompress(row[0])))
+        if key != fingerprint and not crops_match(frame, [(b.box, b.crop_hash) for b in result.bubbles]):
+            return None, None # close thumbnail, different text in the bubbles
+        return key, result
+
+    def get(self, fingerprint: bytes, variant: str, frame):
+        """Stored FrameResult of the page or None, frame is the page's pixels for checking a near match."""
+        if self._conn is None: return None
+        start = time.perf_counter()
+        with self._lock:
+            key, result = self._find(fingerprint, variant, frame)
+            if result is not None:
+                self._conn.execute("UPDATE pages SET last_used = ?, hits = hits + 1 WHERE fingerprint = ? AND variant = ?",
+                                   (time.time(), key, variant))
+        self._latencies.append(time.perf_counter() - start)
+        if result is None: self.misses += 1
+        else: self.hits += 1
+        return result
+
+    def contains(self, fingerprint: bytes, variant: str, frame) -> bool:
+        # no hit counting, the prefetcher asks this for pages nobody has opened yet
+        if self._conn is None: return False
+        with self._lock:
+            if fingerprint in self._index.get(variant, {}): return True
+            return self._find(fingerprint, variant, frame)[1] is not None
+
+    def put(self, fingerprint: bytes, variant: str, result: FrameResult):
+        if self._conn is None: return
+        blob = zlib.compress(json.dumps(result.to_dict(), ensure_ascii=False).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO pages (fingerprint, variant, result, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                               (fingerprint, variant, blob, now, now))
+            self._index.setdefault(variant, {})[fingerprint] = fingerprint_bits(fingerprint)
+            self._puts += 1
+            if self._puts % 64 == 0: self._trim()
+
+    def invalidate(self, fingerprint: bytes):
+        # every variant and every stored key close enough to have been served for it, the page itself was wrong
+        if self._conn is None: return
+        with self._lock:
+            for variant, keys in self._index.items():
+                for key in [key for key in keys if same_frame(key, fingerprint)]:
+                    self._conn.execute("DELETE FROM pages WHERE fingerprint = ? AND variant = ?", (key, variant))
+                    del keys[key]
+        self.invalidated += 1
+
+    def _trim(self):
+        # called with the lock held, least recently used tenth goes when over budget
+        if self._size_bytes() <= self.max_mb * 1024 * 1024: return
+        count = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        self._conn.execute("DELETE FROM pages WHERE (fingerprint, variant) IN "
+                           "(SELECT fingerprint, variant FROM pages ORDER BY last_used LIMIT ?)", (max(1, count // 10),))
+        self._load_index()
+
+    def _size_bytes(self) -> int:
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        used = self._conn.execute("PRAGMA page_count").fetchone()[0] - self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return used * page_size
+
+    def clear(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM pages")
+                self._index = {}
+        self._latencies.clear()
+        self.hits = self.misses = self.invalidated = 0
+
+    def stats(self) -> dict:
+        entries, size = 0, 0
+        if self._conn is not None:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+                size = self._size_bytes()
+        latencies = sorted(self._latencies)
+        lookups = self.hits + self.misses
+        return dict(entries=entries, mb=size / (1024 * 1024), hits=self.hits, misses=self.misses, invalidated=self.invalidated,
+                    hit_rate=self.hits / lookups if lookups else 0.0,
+                    p50_ms=1000 * latencies[len(latencies) // 2] if latencies else 0.0,
+                    p95_ms=1000 * latencies[int(len(latencies) * 0.95)] if latencies else 0.0)
+
+    def report(self) -> str:
+        if self._conn is None: return "Page store: off"
+        s = self.stats()
+        return (f"Page store: {s['entries']} pages in {s['mb']:.1f} MB, {s['hits']} hits, {s['misses']} misses, "
+                f"{s['invalidated']} invalidated, lookup p50 {s['p50_ms']:.2f} ms / p95 {s['p95_ms']:.2f} ms")
+
+
+PAGE_STORE = PageStore()
@@ -0,0 +1,86 @@
+import os
+import sys
+from contextlib import contextmanager
+
+STAGES = ('detect', 'ocr', 'mt')
+# share of the thread budget each stage may use
+THREAD_POLICIES = {
+    'shared': dict(detect=1.0, ocr=1.0, mt=1.0), # every stage gets all cores, fine when only one pipeline runs
+    'balanced': dict(detect=0.5, ocr=0.5, mt=0.5), # any two stages running at once (live mode + a snip) fit the budget
+    'split': dict(detect=0.5, ocr=0.25, mt=0.25), # all three stages at once fit the budget
+}
+DEFAULT_THREAD_POLICY = 'balanced'
+
+
+def available_cores() -> int:
+    # affinity aware where the OS supports it, containers often get fewer cores than cpu_count says
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def parse_thread_split(text: str) -> dict:
+    """'detect=4,ocr=2,mt=2' -> thread count per stage."""
+    split = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        stage, _, count = part.partition('=')
+        if stage not in STAGES: raise ValueError(f"Unknown stage '{stage}', expected one of {', '.join(STAGES)}")
+        split[stage] = int(count)
+    return split
+
+
+class ThreadBudget:
+    """One CPU thread budget for torch, OpenCV and the detect/OCR/MT stages.
+
+    torch.set_num_threads() is process wide, not per calling thread. stage() sets the stage's share around each model
+    call, which holds while one stage runs at a time, the shared backend runs its calls one after another. A snip
+    running next to it sets the count for both, the last stage to start wins. Under 'balanced' every stage has the
+    same share so that costs nothing, under 'split' the overlapping stage runs with the other one's share.
+    """
+    def __init__(self, total=None, policy=DEFAULT_THREAD_POLICY, interop_threads=1):
+        self.total = total or available_cores()
+        self.policy = policy if policy in THREAD_POLICIES else DEFAULT_THREAD_POLICY
+        self.interop_threads = interop_threads
+        self.split = {} # explicit per stage counts, win over the policy
+
+    def configure(self, total=None, policy=None, split=None):
+        if total: self.total = total
+        if policy in THREAD_POLICIES: self.policy = policy
+        if split is not None: self.split = dict(split)
+
+    def stage_threads(self, stage: str) -> int:
+        if stage in self.split:
+            return max(1, min(self.total, self.split[stage]))
+        return max(1, int(self.total * THREAD_POLICIES[self.policy].get(stage, 1.0)))
+
+    def apply(self):
+        # process wide part, called once from load_models before any model runs
+        torch = sys.modules.get('torch')
+        if torch is not None:
+            torch.set_num_threads(self.total)
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError:
+                pass # only allowed before the first parallel op, keeps whatever was set then
+        # our own OpenCV work is small resizes and polygon fills, YOLO's letterboxing is part of detection
+        import cv2
+        cv2.setNumThreads(self.stage_threads('detect'))
+
+    @contextmanager
+    def stage(self, name: str):
+        torch = sys.modules.get('torch')
+        if torch is None:
+            yield
+            return
+        torch.set_num_threads(self.stage_threads(name))
+        try:
+            yield
+        finally:
+            # the whole budget, not the count seen on entry, that may be an overlapping stage's that has ended by now
+            torch.set_num_threads(self.total)
+
+    def describe(self) -> str:
+        counts = ", ".join(f"{stage}={self.stage_threads(stage)}" for stage in STAGES)
+        return f"{self.total} threads, {'custom' if self.split else self.policy} ({counts})"
+
+
+THREAD_BUDGET = ThreadBudget()
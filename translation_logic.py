@@ -0,0 +1,215 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import jaconv
+from threads_logic import THREAD_BUDGET
+
+# named generate() settings shared by live mode and the snipper
+DECODING_PROFILES = {
+    'fast': dict(num_beams=1, do_sample=False, max_length=150),
+    'balanced': dict(num_beams=2, no_repeat_ngram_size=2, max_length=150, early_stopping=True),
+    'quality': dict(num_beams=5, no_repeat_ngram_size=2, length_penalty=2.0, max_length=150, early_stopping=True),
+}
+# MangaOcr only reads Japanese, the target is picked per model
+SOURCE_LANGUAGE = 'ja'
+TARGET_LANGUAGES = {
+    'en': 'English', 'de': 'German', 'fr': 'French', 'es': 'Spanish',
+    'it': 'Italian', 'nl': 'Dutch', 'pl': 'Polish', 'ru': 'Russian',
+}
+DEFAULT_TARGET_LANGUAGE = 'en'
+DEFAULT_CONTINUOUS_PROFILE = 'fast'
+DEFAULT_SNIP_PROFILE = 'quality'
+CACHE_SIZE = 2048
+FUZZY_MIN_LENGTH = 4 # shorter strings change meaning with a single character
+FUZZY_MAX_RATIO = 0.15 # allowed edit distance relative to the text length
+
+# punctuation variants MangaOcr flips between from frame to frame
+_PUNCTUATION_MAP = str.maketrans({'『': '「', '』': '」', '～': '〜', '~': '〜', '｡': '。', '､': '、'})
+_ELLIPSIS_RE = re.compile(r'[．.・…‥]{2,}|…')
+_EXCLAIM_RE = re.compile(r'[！？]{2,}')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class TranslationCache:
+    """Small thread safe LRU of (language pair, profile, text) -> translation."""
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ProfileStats:
+    """Accumulates generate() latency per decoding profile."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+
+    def record(self, profile, seconds):
+        with self._lock:
+            self._latencies.setdefault(profile, []).append(seconds)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                name: dict(count=len(values), mean_ms=1000 * sum(values) / len(values), max_ms=1000 * max(values))
+                for name, values in self._latencies.items() if values
+            }
+
+    def report(self) -> str:
+        lines = [f"{name}: {s['count']} calls, avg {s['mean_ms']:.0f} ms, max {s['max_ms']:.0f} ms" for name, s in self.summary().items()]
+        return "\n".join(lines) if lines else "No translations yet"
+
+
+class TranslationCancelled(Exception):
+    """Raised when the stop event fired while generate() was running."""
+
+
+class StopOnEvent:
+    """generate() stopping criterion, checked after every decoding step so a stop ends beam search within one step."""
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.stop_event.is_set()
+
+
+def normalize_ocr_text(text: str) -> str:
+    """Canonical form of an OCR string so jitter between frames maps to the same cache key."""
+    text = _WHITESPACE_RE.sub('', text)
+    # width folding to MangaOcr's own convention, full width ascii/digits/kana
+    text = jaconv.h2z(text, kana=True, ascii=True, digit=True)
+    text = text.translate(_PUNCTUATION_MAP)
+    text = _ELLIPSIS_RE.sub('…', text)
+    # !!!, !?!, ?! all become one mark, or !? for mixed runs
+    text = _EXCLAIM_RE.sub(lambda m: '！？' if len(set(m.group())) > 1 else m.group()[0], text)
+    return text
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, gives up with limit + 1 once it is clearly over the limit."""
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit: return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyTranslationIndex:
+    """Last translation per tracked bubble, reused while the OCR text only jitters a little."""
+    def __init__(self, max_ratio=FUZZY_MAX_RATIO, min_length=FUZZY_MIN_LENGTH):
+        self.max_ratio = max_ratio
+        self.min_length = min_length
+        self._entries = {} # track id -> (normalized text, variant, translation)
+        self.saved = 0 # translations skipped thanks to a near match
+
+    def lookup(self, track_id, text: str, variant):
+        # variant is whatever else decides the translation, e.g. (language pair, profile)
+        entry = self._entries.get(track_id)
+        if entry is None: return None
+        previous_text, previous_variant, translation = entry
+        if previous_variant != variant: return None
+        if previous_text == text: return translation
+        if min(len(text), len(previous_text)) < self.min_length: return None
+
+        limit = max(1, int(len(text) * self.max_ratio))
+        if edit_distance(previous_text, text, limit) > limit: return None
+        self.saved += 1
+        return translation
+
+    def remember(self, track_id, text: str, variant, translation: str):
+        self._entries[track_id] = (text, variant, translation)
+
+    def retain(self, track_ids):
+        # tracks that are gone can't match anymore
+        for track_id in set(self._entries) - set(track_ids):
+            del self._entries[track_id]
+
+
+TRANSLATION_CACHE = TranslationCache()
+PROFILE_STATS = ProfileStats()
+
+def get_profile_names() -> list[str]:
+    return list(DECODING_PROFILES)
+
+def translation_model_name(source: str, target: str) -> str:
+    # every Helsinki-NLP opus-mt pair follows the same naming
+    return f'Helsinki-NLP/opus-mt-{source}-{target}'
+
+def has_translator(models) -> bool:
+    return 'translators' in models or ('tokenizer' in models and 'translator' in models)
+
+def current_language_pair(models) -> tuple:
+    translators = models.get('translators') if 'translators' in models else None
+    return translators.get_pair() if translators is not None else (SOURCE_LANGUAGE, DEFAULT_TARGET_LANGUAGE)
+
+def _translation_backend(models, pair):
+    # a registry of per pair models when the app loaded one, else the single tokenizer/translator (benchmark stubs)
+    if 'translators' in models:
+        return models['translators'].get(pair)
+    return models['tokenizer'], models['translator']
+
+def translate_text(text: str, models: dict, profile: str = DEFAULT_SNIP_PROFILE, cache: TranslationCache = TRANSLATION_CACHE,
+                   stop_event: threading.Event = None, pair: tuple = None) -> str:
+    """Translates with the given decoding profile into the current (or given) language pair, errors are left to the caller.
+
+    With stop_event set mid generation TranslationCancelled is raised and nothing is cached.
+    """
+    text = normalize_ocr_text(text)
+    if not text: return ""
+
+    if profile not in DECODING_PROFILES:
+        profile = DEFAULT_SNIP_PROFILE
+
+    pair = pair or current_language_pair(models)
+    key = (pair, profile, text)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None: return cached
+
+    tokenizer, model = _translation_backend(models, pair)
+    device = models.get('device', 'cpu')
+
+    generate_kwargs = dict(DECODING_PROFILES[profile])
+    if stop_event is not None:
+        if stop_event.is_set(): raise TranslationCancelled()
+        generate_kwargs['stopping_criteria'] = [StopOnEvent(stop_event)]
+
+    start = time.perf_counter()
+    inputs = tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=512).to(device)
+    with THREAD_BUDGET.stage('mt'):
+        tokens = model.generate(**inputs, **generate_kwargs)
+    if stop_event is not None and stop_event.is_set():
+        raise TranslationCancelled()
+    translated = tokenizer.decode(tokens[0], skip_special_tokens=True)
+    PROFILE_STATS.record(profile, time.perf_counter() - start)
+
+    if cache is not None:
+        cache.put(key, translated)
+    return translated